@@ -0,0 +1,20 @@
+import pandas as pd
+
+
+def totals_frame(totals, label_column, count_column):
+    """Return {value: count} totals as a frame sorted by count, leaving out documents without a value."""
+    df = pd.DataFrame(list(totals.items()), columns=[label_column, count_column])
+    df = df[df[label_column] != '']
+    return df.sort_values(count_column, ascending=False, ignore_index=True)
+
+
+def cumulative_growth(buckets):
+    """Turn (day, value, count) buckets into running document counts per value, one row per day.
+
+    The buckets come pre-aggregated from the local store, so this is a
+    pivot and prefix sum over days rather than a regroup of every document.
+    """
+    df = pd.DataFrame.from_records(buckets, columns=['date', 'value', 'count'])
+    df = df[df['value'] != '']
+    df['date'] = pd.to_datetime(df['date'])
+    return df.pivot(index='date', columns='value', values='count').fillna(0).cumsum().reset_index()
@@ -0,0 +1,426 @@
+"""Synthetic, deterministic mock of the DMS REST API used by the dashboard and the Document Viewer.
+
+Serves /api/v4/documents/, cabinets, tags, index_instances (with nested
+node and children URLs), document_types with their metadata types, and
+the processBase64File upload endpoint. Records are generated on the fly
+from their ids, so a million documents cost no memory. Request counts and
+bytes are exposed at /_stats (and reset with /_stats/reset).
+
+Like the real server, pages carry ETag and Last-Modified validators,
+conditional requests for unchanged pages are answered with 304, and
+bodies are gzip or deflate encoded when the client accepts it. The data
+changes only through /_touch, e.g. /_touch?documents=1010, which updates
+the scale and the modification time.
+
+Run standalone with ``python benchmarks/mock_dms.py --documents 100000``
+and point the app at it with DMS_API_ROOT and DMS_SUBMIT_URL.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+DEFAULT_PAGE_SIZE = 100
+MIN_COMPRESS_BYTES = 512
+MAX_PAGE_SIZE = 1000
+START = datetime(2021, 1, 1, tzinfo=timezone.utc)
+HISTORY_DAYS = 3 * 365
+MIMETYPES = ['application/pdf', 'image/jpeg', 'image/png', 'image/tiff',
+             'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
+TAG_COLORS = ['#e6194b', '#3cb44b', '#ffe119', '#4363d8', '#f58231', '#911eb4', '#46f0f0', '#f032e6']
+
+
+class MockConfig:
+    """Scale and latency of the synthetic dataset."""
+
+    def __init__(self, documents=1000, document_types=20, cabinets=50, cabinet_roots=5, cabinet_branching=3,
+                 tags=15, indexes=3, index_depth=3, index_branching=4, metadata_types=5, latency_ms=0, seed=1):
+        self.documents = documents
+        self.document_types = document_types
+        self.cabinets = cabinets
+        self.cabinet_roots = cabinet_roots
+        self.cabinet_branching = cabinet_branching
+        self.tags = tags
+        self.indexes = indexes
+        self.index_depth = index_depth
+        self.index_branching = index_branching
+        self.metadata_types = metadata_types
+        self.latency_ms = latency_ms
+        self.seed = seed
+
+
+def _rand(i, salt, seed):
+    """Deterministic pseudo-random float in [0, 1) for an id and a salt."""
+    x = (i * 2654435761 + salt * 40503 + seed * 97) & 0xFFFFFFFF
+    x ^= x >> 16
+    x = (x * 0x45D9F3B) & 0xFFFFFFFF
+    x ^= x >> 16
+    return x / 2 ** 32
+
+
+class MockDMS:
+    """Generates the synthetic records and routes API paths to them."""
+
+    def __init__(self, config, base_url):
+        self.config = config
+        self.base_url = base_url.rstrip('/')
+        self.api = self.base_url + '/api/v4/'
+        self.stats_lock = threading.Lock()
+        self.modified_at = int(time.time())
+        self.reset_stats()
+
+    # Statistics
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {'requests': 0, 'not_modified': 0, 'bytes_out': 0, 'bytes_in': 0, 'by_endpoint': {}}
+
+    def record(self, path, bytes_out, bytes_in, status=200):
+        endpoint = re.sub(r'/\d+', '/{id}', path)
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['not_modified'] += status == 304
+            self.stats['bytes_out'] += bytes_out
+            self.stats['bytes_in'] += bytes_in
+            self.stats['by_endpoint'][endpoint] = self.stats['by_endpoint'].get(endpoint, 0) + 1
+
+    def touch(self, changes):
+        """Change the scale of the dataset and mark every page as modified now."""
+        for name, value in changes.items():
+            if hasattr(self.config, name):
+                setattr(self.config, name, int(value))
+        self.modified_at = max(int(time.time()), self.modified_at + 1)
+
+    # Records
+
+    def rand(self, i, salt):
+        return _rand(i, salt, self.config.seed)
+
+    def document(self, i):
+        c = self.config
+        created = START + timedelta(seconds=(i - 1) * HISTORY_DAYS * 86400 / max(c.documents, 1))
+        type_id = 1 + int(self.rand(i, 1) * c.document_types)
+        mimetype = MIMETYPES[int(self.rand(i, 2) ** 2 * len(MIMETYPES))]
+        return {
+            'id': i,
+            'label': f"Document {i:07d}",
+            'datetime_created': created.isoformat().replace('+00:00', 'Z'),
+            'description': '',
+            'language': 'eng',
+            'uuid': f"00000000-0000-0000-0000-{i:012d}",
+            'url': f"{self.api}documents/{i}/",
+            'document_type': {'id': type_id, 'label': f"Type {type_id:02d}",
+                              'url': f"{self.api}document_types/{type_id}/"},
+            'file_latest': {'id': i, 'mimetype': mimetype, 'size': 50000 + int(self.rand(i, 3) * 5000000),
+                            'filename': f"document_{i}.{mimetype.split('/')[-1]}",
+                            'timestamp': created.isoformat().replace('+00:00', 'Z')},
+        }
+
+    def document_ids(self, owner, salt, count):
+        n = self.config.documents
+        return [(owner * 7919 + salt * 104729 + j * 31) % n + 1 for j in range(count)] if n else []
+
+    def cabinet_parent(self, k):
+        c = self.config
+        return None if k <= c.cabinet_roots else (k - c.cabinet_roots - 1) // c.cabinet_branching + 1
+
+    def cabinet(self, k):
+        parts = []
+        node = k
+        while node is not None:
+            parts.append(f"Cabinet {node}")
+            node = self.cabinet_parent(node)
+        return {
+            'id': k,
+            'label': f"Cabinet {k}",
+            'full_path': ' / '.join(reversed(parts)),
+            'parent_id': self.cabinet_parent(k),
+            'documents_url': f"{self.api}cabinets/{k}/documents/",
+            'url': f"{self.api}cabinets/{k}/",
+        }
+
+    def cabinet_document_count(self, k):
+        return int(self.rand(k, 4) * min(self.config.documents, 2 * self.config.documents / max(self.config.cabinets, 1)))
+
+    def tag(self, t):
+        return {
+            'id': t,
+            'label': f"Tag {t}",
+            'color': TAG_COLORS[t % len(TAG_COLORS)],
+            'documents_url': f"{self.api}tags/{t}/documents/",
+            'url': f"{self.api}tags/{t}/",
+        }
+
+    def tag_document_count(self, t):
+        return int(self.rand(t, 5) * self.config.documents / 3)
+
+    def index(self, x):
+        return {
+            'id': x,
+            'label': f"Index {x}",
+            'nodes_url': f"{self.api}index_instances/{x}/nodes/",
+            'url': f"{self.api}index_instances/{x}/",
+        }
+
+    def node_depth(self, n):
+        depth = 0
+        while n > 0:
+            n = (n - 1) // self.config.index_branching
+            depth += 1
+        return depth
+
+    def node(self, x, n):
+        depth = self.node_depth(n)
+        return {
+            'id': n,
+            'value': '' if n == 0 else f"Value {x}.{n}",
+            'level': depth,
+            'documents_url': f"{self.api}index_instances/{x}/nodes/{n}/documents/",
+            'children_url': f"{self.api}index_instances/{x}/nodes/{n}/children/",
+            'url': f"{self.api}index_instances/{x}/nodes/{n}/",
+        }
+
+    def node_children(self, n):
+        if self.node_depth(n) >= self.config.index_depth:
+            return []
+        b = self.config.index_branching
+        return list(range(n * b + 1, n * b + b + 1))
+
+    def node_document_count(self, x, n):
+        if self.node_children(n):
+            return 0  # Documents live in the leaves
+        return int(self.rand(x * 100003 + n, 6) * 200)
+
+    def document_type(self, d):
+        return {'id': d, 'label': f"Type {d:02d}", 'url': f"{self.api}document_types/{d}/"}
+
+    def metadata_type(self, d, m):
+        meta_id = (d - 1) * self.config.metadata_types + m
+        kind = m % 3
+        info = {'id': meta_id, 'label': f"Field {m} of type {d}", 'name': f"field_{meta_id}",
+                'lookup': '', 'validation_arguments': ''}
+        if kind == 1:
+            info['validation_arguments'] = "{'pattern': '^[0-9]{4,10}$'}"
+        elif kind == 2:
+            info['lookup'] = 'Tokyo,Osaka,Nagoya,Fukuoka'
+        return {'id': meta_id, 'required': m == 1, 'metadata_type': info}
+
+    # Routing
+
+    def page(self, url_path, query, total, make_item):
+        page_size = min(int(query.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        page = int(query.get('page', 1))
+        pages = max(1, math.ceil(total / page_size))
+        if page > pages:
+            return None
+        start = (page - 1) * page_size
+        indices = range(start, min(start + page_size, total))
+
+        def link(number):
+            return f"{self.base_url}{url_path}?{urlencode({**query, 'page': number})}"
+
+        return {
+            'count': total,
+            'next': link(page + 1) if page < pages else None,
+            'previous': link(page - 1) if page > 1 else None,
+            'results': [make_item(position) for position in indices],
+        }
+
+    def get(self, path, query):
+        """Return the JSON body for a GET, or None for an unknown path."""
+        c = self.config
+        api = '/api/v4/'
+        if not path.startswith(api):
+            return None
+        route = path[len(api):].strip('/')
+        parts = route.split('/') if route else []
+
+        if parts == ['documents']:
+            descending = query.get('_ordering') == '-datetime_created'
+            return self.page(path, query, c.documents,
+                             lambda p: self.document(c.documents - p if descending else p + 1))
+        if parts == ['cabinets']:
+            return self.page(path, query, c.cabinets, lambda p: self.cabinet(p + 1))
+        if len(parts) == 3 and parts[0] in ('cabinets', 'tags') and parts[2] == 'documents':
+            owner = int(parts[1])
+            total = self.cabinet_document_count(owner) if parts[0] == 'cabinets' else self.tag_document_count(owner)
+            salt = 1 if parts[0] == 'cabinets' else 2
+            ids = self.document_ids(owner, salt, total)
+            return self.page(path, query, total, lambda p: self.document(ids[p]))
+        if parts == ['tags']:
+            return self.page(path, query, c.tags, lambda p: self.tag(p + 1))
+        if parts == ['index_instances']:
+            return self.page(path, query, c.indexes, lambda p: self.index(p + 1))
+        if len(parts) == 3 and parts[0] == 'index_instances' and parts[2] == 'nodes':
+            x = int(parts[1])
+            return self.page(path, query, 1, lambda p: self.node(x, 0))
+        if len(parts) == 5 and parts[0] == 'index_instances' and parts[2] == 'nodes':
+            x, n = int(parts[1]), int(parts[3])
+            if parts[4] == 'children':
+                children = self.node_children(n)
+                return self.page(path, query, len(children), lambda p: self.node(x, children[p]))
+            if parts[4] == 'documents':
+                total = self.node_document_count(x, n)
+                ids = self.document_ids(x * 100003 + n, 3, total)
+                return self.page(path, query, total, lambda p: self.document(ids[p]))
+        if parts == ['document_types']:
+            return self.page(path, query, c.document_types, lambda p: self.document_type(p + 1))
+        if len(parts) == 3 and parts[0] == 'document_types' and parts[2] == 'metadata_types':
+            d = int(parts[1])
+            return self.page(path, query, c.metadata_types, lambda p: self.metadata_type(d, p + 1))
+        if parts == ['groups'] or parts == ['metadata_types']:
+            return self.page(path, query, 0, lambda p: {})
+        return None
+
+
+def make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real server
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body, bytes_in=0):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return len(payload)
+
+        def not_modified(self, etag, last_modified):
+            match = self.headers.get('If-None-Match')
+            if match is not None:
+                return etag in [tag.strip() for tag in match.split(',')] or match.strip() == '*'
+            since = self.headers.get('If-Modified-Since')
+            if since is None:
+                return False
+            try:
+                return parsedate_to_datetime(since).timestamp() >= last_modified
+            except (TypeError, ValueError):
+                return False
+
+        def send_page(self, body):
+            """Send an API page with validators, honouring conditional and compressed requests."""
+            payload = json.dumps(body).encode('utf-8')
+            etag = 'W/"' + hashlib.sha1(payload).hexdigest()[:20] + '"'
+            headers = {'ETag': etag, 'Last-Modified': formatdate(mock.modified_at, usegmt=True),
+                       'Vary': 'Accept-Encoding'}
+            if self.not_modified(etag, mock.modified_at):
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return 0, 304
+            accepted = self.headers.get('Accept-Encoding', '')
+            if len(payload) >= MIN_COMPRESS_BYTES and 'gzip' in accepted:
+                payload, headers['Content-Encoding'] = gzip.compress(payload, compresslevel=6), 'gzip'
+            elif len(payload) >= MIN_COMPRESS_BYTES and 'deflate' in accepted:
+                payload, headers['Content-Encoding'] = zlib.compress(payload, 6), 'deflate'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+            return len(payload), 200
+
+        def delay(self):
+            if mock.config.latency_ms:
+                time.sleep(mock.config.latency_ms / 1000)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path == '/_stats':
+                with mock.stats_lock:
+                    self.send_json(200, mock.stats)
+                return
+            if parts.path == '/_stats/reset':
+                mock.reset_stats()
+                self.send_json(200, {})
+                return
+            if parts.path == '/_touch':
+                mock.touch(dict(parse_qsl(parts.query)))
+                self.send_json(200, {'modified_at': mock.modified_at})
+                return
+            self.delay()
+            try:
+                body = mock.get(parts.path, dict(parse_qsl(parts.query)))
+            except (ValueError, IndexError):
+                body = None
+            if body is None:
+                sent, status = self.send_json(404, {'detail': 'Not found.'}), 404
+            else:
+                sent, status = self.send_page(body)
+            mock.record(parts.path, sent, 0, status)
+
+        def do_POST(self):
+            parts = urlsplit(self.path)
+            self.delay()
+            received = 0
+            length = int(self.headers.get('Content-Length', 0))
+            while received < length:
+                chunk = self.rfile.read(min(1024 * 1024, length - received))
+                if not chunk:
+                    break
+                received += len(chunk)
+            if parts.path.rstrip('/') == '/api/processBase64File':
+                sent = self.send_json(200, {'status': 'success', 'received': received})
+            else:
+                sent = self.send_json(404, {'detail': 'Not found.'})
+            mock.record(parts.path, sent, received)
+
+    return Handler
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Start the mock in a background thread and return (server, mock, base URL)."""
+    server = ThreadingHTTPServer((host, port), None)
+    base_url = f"http://{host}:{server.server_address[1]}"
+    mock = MockDMS(config, base_url)
+    server.RequestHandlerClass = make_handler(mock)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, mock, base_url
+
+
+def config_arguments(parser):
+    """Add the dataset scale and latency options to an argument parser."""
+    defaults = MockConfig()
+    for name in vars(defaults):
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=getattr(defaults, name))
+
+
+def config_from_arguments(args):
+    return MockConfig(**{name: getattr(args, name) for name in vars(MockConfig())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    config_arguments(parser)
+    args = parser.parse_args()
+    server, mock, base_url = start_server(config_from_arguments(args), args.host, args.port)
+    print(f"Mock DMS serving {args.documents} documents at {base_url}")
+    print(f"  DMS_API_ROOT={mock.api}")
+    print(f"  DMS_SUBMIT_URL={base_url}/api/processBase64File")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark the dashboard views and the upload path against the local mock DMS.
+
+Each dashboard view is run headlessly with Streamlit's AppTest, once cold
+(empty local store and caches), once warm, and once as a refresh of
+unchanged data (snapshots dropped, conditional requests answered with
+304). For every run the suite records wall time, HTTP requests, 304
+responses, bytes transferred (as counted by the mock) and peak Python
+memory. Results are printed as a table and can be
+written as JSON to track regressions:
+
+    python benchmarks/run_benchmarks.py --documents 100000 --latency-ms 20 --output bench.json
+    python benchmarks/run_benchmarks.py --documents 100000 --baseline bench.json
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_dms import config_arguments, config_from_arguments, start_server  # noqa: E402
+
+VIEWS = ("Document Type", "Cabinet Document Distribution", "Document Tags",
+         "Document Count by Index and Node Value")
+
+
+def fetch_stats(base_url, reset=False):
+    with urllib.request.urlopen(base_url + ('/_stats/reset' if reset else '/_stats')) as response:
+        return json.load(response)
+
+
+def measure(base_url, run):
+    """Run a callable and return its wall time, request count, bytes and peak memory."""
+    fetch_stats(base_url, reset=True)
+    tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = fetch_stats(base_url)
+    return {'seconds': round(seconds, 3), 'requests': stats['requests'], 'not_modified': stats['not_modified'],
+            'bytes_out': stats['bytes_out'],
+            'bytes_in': stats['bytes_in'], 'peak_mb': round(peak / 1e6, 1)}
+
+
+def reset_snapshots():
+    """Drop the loaded datasets but keep the local store and the cached page validators."""
+    from refresh_scheduler import scheduler
+    scheduler.clear()
+
+
+def reset_local_state(store_path):
+    """Empty the local document store and every in-process cache, as on a cold start."""
+    import dms_cache
+    from dms_client import clear_page_cache
+    reset_snapshots()
+    dms_cache.cache.invalidate()
+    clear_page_cache()
+    for suffix in ('', '-wal', '-shm'):
+        Path(store_path + suffix).unlink(missing_ok=True)
+
+
+def run_view(view, timeout):
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(str(ROOT / 'Dashboard.py'), default_timeout=timeout)
+    app.session_state['dashboard_view'] = view
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"{view} failed: {app.exception[0].value}")
+
+
+def run_upload(size_mb):
+    from upload import send_with_retry, submission_body
+    upload = io.BytesIO(os.urandom(1024 * 1024) * size_mb)
+    upload.name, upload.size = 'benchmark.pdf', upload.getbuffer().nbytes
+    response = send_with_retry(submission_body(upload, 1, {1: '2024'}))
+    if response.status_code != 200:
+        raise RuntimeError(f"Upload failed: {response.status_code}")
+
+
+def print_table(results, baseline):
+    header = f"{'benchmark':48} {'seconds':>9} {'requests':>9} {'304s':>6} {'MB out':>9} {'MB in':>8} {'peak MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        line = (f"{name:48} {result['seconds']:9.3f} {result['requests']:9d} {result.get('not_modified', 0):6d} "
+                f"{result['bytes_out'] / 1e6:9.2f} "
+                f"{result['bytes_in'] / 1e6:8.2f} {result['peak_mb']:8.1f}")
+        if name in baseline and baseline[name]['seconds']:
+            line += f"  ({result['seconds'] / baseline[name]['seconds']:.2f}x baseline time)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    config_arguments(parser)
+    parser.add_argument('--views', nargs='*', default=list(VIEWS), help="dashboard views to run")
+    parser.add_argument('--upload-mb', type=int, default=20, help="size of the synthetic upload")
+    parser.add_argument('--timeout', type=float, default=1800, help="seconds allowed per view run")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    server, mock, base_url = start_server(config_from_arguments(args))
+    store_path = os.path.join(tempfile.mkdtemp(prefix='dms-bench-'), 'store.sqlite3')
+    # Must be set before the app modules are imported, since they read it at import time
+    os.environ['DMS_API_ROOT'] = mock.api
+    os.environ['DMS_SUBMIT_URL'] = base_url + '/api/processBase64File'
+    os.environ['DMS_STORE_PATH'] = store_path
+
+    results = {}
+    for view in args.views:
+        reset_local_state(store_path)
+        results[f"{view} (cold)"] = measure(base_url, lambda: run_view(view, args.timeout))
+        results[f"{view} (warm)"] = measure(base_url, lambda: run_view(view, args.timeout))
+        reset_snapshots()
+        results[f"{view} (refresh)"] = measure(base_url, lambda: run_view(view, args.timeout))
+    if args.upload_mb:
+        results[f"Upload {args.upload_mb} MB"] = measure(base_url, lambda: run_upload(args.upload_mb))
+    server.shutdown()
+
+    baseline = json.loads(Path(args.baseline).read_text())['results'] if args.baseline else {}
+    print_table(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps({'config': vars(args), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
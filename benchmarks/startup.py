@@ -0,0 +1,109 @@
+"""Benchmark cold start of the dashboard views and the Document Viewer against the local mock DMS.
+
+Every script is run with Streamlit's AppTest in a fresh Python process,
+so module imports are as cold as on a new server. For each run the suite
+records the time to first paint (the script reaching its skeleton, as
+recorded by the app), the time spent importing the view module, the
+whole run, and which heavy libraries ended up imported. Results are
+printed as a table and can be written as JSON to track regressions:
+
+    python benchmarks/startup.py --output startup.json
+    python benchmarks/startup.py --baseline startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_dms import config_arguments, config_from_arguments, start_server  # noqa: E402
+
+HEAVY_MODULES = ('pandas', 'numpy', 'plotly', 'fitz', 'PIL', 'openpyxl', 'requests')
+TARGETS = [('Dashboard.py', view) for view in ("Document Type", "Cabinet Document Distribution", "Document Tags",
+                                               "Document Count by Index and Node Value")]
+TARGETS.append(('pages/Metadata.py', None))
+
+
+def run_child(script, view, timeout):
+    """Run one script in this (fresh) process and print its timings as JSON."""
+    from streamlit.testing.v1 import AppTest
+    before = set(sys.modules)
+    app = AppTest.from_file(str(ROOT / script), default_timeout=timeout)
+    if view:
+        app.session_state['dashboard_view'] = view
+    started = time.perf_counter()
+    app.run()
+    seconds = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"{script} {view or ''} failed: {app.exception[0].value}")
+
+    from instrumentation import phase_records
+    phases = {record['phase']: record['seconds'] for record in phase_records()}
+    print(json.dumps({
+        'first_paint': round(phases.get('first_paint', 0.0), 3),
+        'import': round(phases.get('import', 0.0), 3),
+        'seconds': round(seconds, 3),
+        'heavy_modules': sorted(name for name in HEAVY_MODULES if name in sys.modules and name not in before),
+    }))
+
+
+def measure(script, view, timeout, env):
+    command = [sys.executable, __file__, '--child', script, '--timeout', str(timeout)]
+    if view:
+        command += ['--view', view]
+    output = subprocess.run(command, env=env, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_table(results, baseline):
+    header = f"{'benchmark':52} {'first paint':>12} {'import':>8} {'seconds':>9}  heavy modules"
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        line = (f"{name:52} {result['first_paint']:12.3f} {result['import']:8.3f} {result['seconds']:9.3f}  "
+                f"{', '.join(result['heavy_modules']) or '-'}")
+        if name in baseline and baseline[name]['first_paint']:
+            line += f"  ({result['first_paint'] / baseline[name]['first_paint']:.2f}x baseline first paint)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    config_arguments(parser)
+    parser.add_argument('--timeout', type=float, default=600, help="seconds allowed per script run")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare against a previous JSON result file")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--view', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child, args.view, args.timeout)
+        return
+
+    server, mock, base_url = start_server(config_from_arguments(args))
+    store_path = os.path.join(tempfile.mkdtemp(prefix='dms-startup-'), 'store.sqlite3')
+    env = dict(os.environ, DMS_API_ROOT=mock.api, DMS_SUBMIT_URL=base_url + '/api/processBase64File',
+               DMS_STORE_PATH=store_path)
+
+    results = {}
+    for script, view in TARGETS:
+        name = f"{script} {view}" if view else script
+        results[name] = measure(script, view, args.timeout, env)
+    server.shutdown()
+
+    baseline = json.loads(Path(args.baseline).read_text())['results'] if args.baseline else {}
+    print_table(results, baseline)
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ('child', 'view')}
+        Path(args.output).write_text(json.dumps({'config': config, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
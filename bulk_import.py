@@ -0,0 +1,92 @@
+import pandas as pd
+
+FILE_COLUMNS = ('file_name', 'file', 'filename')  # accepted headers for the file name column
+REPORT_COLUMNS = ['Row', 'File', 'Field', 'Error']
+
+
+def read_sheet(uploaded_sheet):
+    """Read a CSV or Excel sheet of metadata with every cell as a string."""
+    if uploaded_sheet.name.lower().endswith('.csv'):
+        df = pd.read_csv(uploaded_sheet, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(uploaded_sheet, dtype=str, keep_default_na=False)
+    return df.fillna('')
+
+
+def _find_column(df, names):
+    by_name = {str(column).strip().lower(): column for column in df.columns}
+    for name in names:
+        if name.strip().lower() in by_name:
+            return by_name[name.strip().lower()]
+    return None
+
+
+def file_column(df):
+    """Return the sheet column holding file names, or None."""
+    return _find_column(df, FILE_COLUMNS)
+
+
+def metadata_columns(df, schema):
+    """Map each metadata type id to the sheet column holding it, matched by label or id."""
+    return {field.id: _find_column(df, (field.label, str(field.id))) for field in schema.fields}
+
+
+def _report(df, mask, names_column, field_label, messages):
+    return pd.DataFrame({
+        'Row': df.index[mask] + 2,  # 1-based, after the header line
+        'File': df.loc[mask, names_column],
+        'Field': field_label,
+        'Error': messages[mask] if isinstance(messages, pd.Series) else messages,
+    })
+
+
+def validate_sheet(df, schema):
+    """Validate every row of a metadata sheet against a document type schema at once.
+
+    Uses the same rules as the single-document form (required flag,
+    validation pattern matched from the start, lookup options), applied as
+    vectorized column operations. Returns the valid rows and a report with
+    one line per failed check.
+    """
+    names_column = file_column(df)
+    if names_column is None:
+        raise ValueError(f"The sheet needs a file name column ({', '.join(FILE_COLUMNS)}).")
+
+    columns = metadata_columns(df, schema)
+    reports = []
+    names = df[names_column].str.strip()
+    for mask, message in ((names == '', "File name is missing."),
+                          (names.ne('') & names.duplicated(keep=False), "File name appears more than once.")):
+        if mask.any():
+            reports.append(_report(df, mask, names_column, names_column, message))
+
+    for field in schema.fields:
+        column = columns[field.id]
+        values = df[column] if column is not None else pd.Series('', index=df.index)
+        missing = values.str.strip().eq('') if field.required else pd.Series(False, index=df.index)
+        failed = pd.Series(False, index=df.index)
+        if field.regex is not None:
+            failed = ~missing & ~values.str.match(field.pattern)
+        not_option = pd.Series(False, index=df.index)
+        if field.option_set:
+            not_option = ~missing & ~failed & values.ne('') & ~values.isin(field.option_set)
+
+        if missing.any():
+            reports.append(_report(df, missing, names_column, field.label, f"Field '{field.label}' is required."))
+        if failed.any():
+            reports.append(_report(df, failed, names_column, field.label,
+                                   f"Validation failed for {field.label}: " + values))
+        if not_option.any():
+            reports.append(_report(df, not_option, names_column, field.label,
+                                   f"Value for {field.label} is not one of its lookup options: " + values))
+
+    report = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=REPORT_COLUMNS)
+    report = report.sort_values('Row', kind='stable', ignore_index=True)
+    valid = df[~(df.index + 2).isin(report['Row'])]
+    return valid, report
+
+
+def row_metadata(row, schema, columns):
+    """Return {metadata type id: value} for one sheet row."""
+    return {field.id: row[columns[field.id]] if columns[field.id] is not None else ''
+            for field in schema.fields}
@@ -0,0 +1,74 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Growth chart rendering limits
+CHART_WIDTH_PX = 800     # points kept per series, about one per horizontal pixel
+WEBGL_THRESHOLD = 5000   # total points above which traces switch to WebGL
+MAX_SERIES = 12          # series shown before the rest are folded into "Other"
+OTHER_LABEL = "Other"
+
+
+def lttb_indices(x, y, threshold):
+    """Pick the indices of up to threshold points that keep a series' shape (Largest-Triangle-Three-Buckets).
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    bucket_size = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def cap_series(df_plot, max_series=MAX_SERIES, x_column='date'):
+    """Keep the largest series and sum the remaining ones into a single "Other" series."""
+    series = [column for column in df_plot.columns if column != x_column]
+    if len(series) <= max_series:
+        return df_plot
+    ranked = df_plot[series].iloc[-1].sort_values(ascending=False).index
+    keep, fold = list(ranked[:max_series - 1]), list(ranked[max_series - 1:])
+    capped = df_plot[[x_column] + keep].copy()
+    capped[OTHER_LABEL] = df_plot[fold].sum(axis=1)
+    return capped
+
+
+def growth_figure(df_plot, title, legend_title, width_px=CHART_WIDTH_PX, height=400, x_column='date'):
+    """Build the cumulative growth line chart with the payload bounded by the chart width.
+
+    Series are capped to MAX_SERIES, each one is downsampled to about one
+    point per pixel with LTTB, and WebGL traces are used once the total
+    point count passes WEBGL_THRESHOLD.
+    """
+    df_plot = cap_series(df_plot, x_column=x_column)
+    x = df_plot[x_column].to_numpy()
+    x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    traces = []
+    for column in df_plot.columns:
+        if column == x_column:
+            continue
+        y = df_plot[column].to_numpy()
+        keep = lttb_indices(x_numeric, y, width_px)
+        traces.append((str(column), x[keep], y[keep]))
+
+    trace_type = go.Scattergl if sum(len(t[1]) for t in traces) > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure([trace_type(x=tx, y=ty, name=name, mode='lines') for name, tx, ty in traces])
+    fig.update_layout(title=title, height=height, xaxis_title='Date', yaxis_title='Cumulative Document Count',
+                      legend_title=legend_title)
+    return fig
@@ -0,0 +1,13 @@
+"""Dashboard views, each in its own module so that only the selected one and its libraries are imported.
+
+VIEWS maps the sidebar label of a view to its module and to the name of
+the background dataset it reads. This package must stay free of heavy
+imports: Dashboard.py reads it before the first paint.
+"""
+
+VIEWS = {
+    "Document Type": ("dashboard_views.document_types", "documents"),
+    "Cabinet Document Distribution": ("dashboard_views.cabinets", "cabinets"),
+    "Document Tags": ("dashboard_views.tags", "tags"),
+    "Document Count by Index and Node Value": ("dashboard_views.index_nodes", "index_trees"),
+}
@@ -0,0 +1,34 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from dashboard_views.common import latest, urls
+from dms_cache import cached_fetch_counts
+from dms_client import fetch_all
+from hierarchy import build_cabinet_tree
+from instrumentation import timed_phase
+
+VIEW = "Cabinet Document Distribution"
+
+
+def load_cabinet_tree():
+    cabinets = fetch_all(urls['cabinets'])
+    # Direct document counts for every cabinet, cached per cabinet and fetched concurrently as count-only requests
+    document_counts = cached_fetch_counts([cabinet['documents_url'] for cabinet in cabinets])
+    # One node per level of each cabinet's full path, so nested cabinets keep their hierarchy
+    return build_cabinet_tree(cabinets, document_counts)
+
+
+def render():
+    st.header('Cabinets')
+    with timed_phase(VIEW, 'fetch'):
+        cabinet_tree = latest("cabinets", load_cabinet_tree)
+    if cabinet_tree:
+        with timed_phase(VIEW, 'aggregate'):
+            df_cabinet_documents = pd.DataFrame(cabinet_tree)
+
+        # Treemap with document counts; a parent's area is its own documents plus its children's
+        with timed_phase(VIEW, 'figure'):
+            fig_cabinets = px.treemap(df_cabinet_documents, ids='id', names='label', parents='parent', values='document_count',
+                                    title="Cabinet Document Distribution", hover_data={'document_count': True}, height=600, width=900)
+        st.plotly_chart(fig_cabinets)
@@ -0,0 +1,46 @@
+import streamlit as st
+
+from dms_client import API_ROOT
+from document_store import document_count, sync_documents
+from instrumentation import timed_phase
+from refresh_scheduler import scheduler
+
+# URLs for the data
+urls = {
+    "documents": API_ROOT + "documents/",
+    "cabinets": API_ROOT + "cabinets/",
+    "tags": API_ROOT + "tags/",
+    "groups": API_ROOT + "groups/",
+    "metadata_types": API_ROOT + "metadata_types/",
+    "index_instances": API_ROOT + "index_instances/",
+}
+
+# Seconds between background refreshes of each dataset
+REFRESH_INTERVALS = {
+    "documents": 300,
+    "cabinets": 600,
+    "tags": 600,
+    "index_trees": 900,
+}
+
+
+# Datasets are loaded by a process-wide background scheduler, so sessions share one fetch per dataset
+def latest(name, loader):
+    """Return the latest snapshot value of a dataset, showing the error of a failed refresh."""
+    scheduler.register(name, loader, REFRESH_INTERVALS[name])
+    snapshot = scheduler.get(name)
+    if snapshot.error is not None:
+        st.error(str(snapshot.error))
+    return snapshot.value
+
+
+# Documents are synced into the local store, which the views then query with their filters
+def sync_store():
+    """Return the number of stored documents, syncing the store with the API in the background."""
+    def sync_and_count():
+        with timed_phase("Document Type", 'fetch'):
+            sync_documents(urls['documents'])
+        return document_count()
+    count = latest("documents", sync_and_count)
+    # Serve whatever the local store already holds if the first sync failed
+    return count if count is not None else document_count()
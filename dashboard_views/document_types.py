@@ -0,0 +1,176 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from aggregates import cumulative_growth, totals_frame
+from charts import growth_figure
+from dashboard_views.common import sync_store, urls
+from document_query import DocumentFilter, query_page
+from document_store import daily_counts, day_range, dimension_totals, mimetypes_for_extensions
+from instrumentation import timed_phase
+
+VIEW = "Document Type"
+
+# Rows sent to the browser per page of the documents table
+TABLE_PAGE_SIZE = 50
+TABLE_SORTS = {"Created": 'datetime_created', "Label": 'label', "Document type": 'document_type'}
+
+
+def documents_table(filters):
+    """Show one page of the documents matching filters, searched, sorted and paged in the local store."""
+    search = st.text_input("Search labels", key='documents_search')
+    col_sort, col_order, col_page = st.columns([4, 3, 3])
+    with col_sort:
+        sort = st.selectbox("Sort by", list(TABLE_SORTS), key='documents_sort')
+    with col_order:
+        descending = st.toggle("Descending", key='documents_descending')
+    filters.search = search.strip() or None
+    # The page number is read before the query so that only its rows are fetched
+    page = st.session_state.get('documents_page', 1)
+    with timed_phase(VIEW, 'fetch'):
+        window, total = query_page(filters, urls['documents'], TABLE_SORTS[sort], descending, page, TABLE_PAGE_SIZE)
+    pages = max(1, -(-total // TABLE_PAGE_SIZE))
+    if page > pages:
+        page = st.session_state['documents_page'] = pages
+        window, total = query_page(filters, urls['documents'], TABLE_SORTS[sort], descending, page, TABLE_PAGE_SIZE)
+    with col_page:
+        st.number_input("Page", min_value=1, max_value=pages, key='documents_page')
+    st.caption(f"{total:,} documents · page {page} of {pages}")
+    st.dataframe(window[['label', 'document_type', 'datetime_created']], hide_index=True)
+
+
+def render():
+    st.header('Document Types')
+    total_documents_count = sync_store()
+    # Type and extension totals come from the materialized daily counts in the local store
+    with timed_phase(VIEW, 'aggregate'):
+        type_counts = totals_frame(dimension_totals('document_type'), 'type_label', 'count')
+    unique_document_types_count = len(type_counts)
+    if total_documents_count:
+        # Document Type Charts
+        # [Include your visualization code for Document Types here]
+        col1, col2, col3 = st.columns([1.5, 4, 4.5], gap='small')
+        # Tính toán tổng số loại tài liệu (loại tài liệu duy nhất)
+
+        with col1:
+            st.markdown('##### Statistics')
+            st.metric(label="Total Documents", value=f"{total_documents_count}")
+            st.metric(label="Total Document Types", value=f"{unique_document_types_count}")
+        with col2:
+
+            st.markdown('##### Document Type Distribution')
+            fig_pie = px.pie(type_counts, names='type_label', values='count', width=400)
+            st.plotly_chart(fig_pie)
+        with col3:
+            st.markdown('##### Popularity of Document Types by Label')
+            # Determine min and max values for input based on data
+            min_doc_count = type_counts['count'].min()
+            max_doc_count = type_counts['count'].max()
+            # Filter input
+            col_number_input1, col_number_input2, col_number_input_empty = st.columns([ 3, 3,4], gap='small')
+            with col_number_input1:
+                min_count = st.number_input('Minimum count', min_value=0, max_value=max_doc_count, value=min_doc_count)
+            with col_number_input2:
+                max_count = st.number_input('Maximum count', min_value=0, max_value=max_doc_count, value=max_doc_count)
+            # Filtering based on input
+            filtered_type_counts = type_counts[(type_counts['count'] >= min_count) & (type_counts['count'] <= max_count)]
+            fig_bubble = px.scatter(filtered_type_counts, x='type_label', y='count',
+                                size='count', color='type_label',
+                                hover_name='type_label', size_max=40, width=450)
+            st.plotly_chart(fig_bubble)
+
+        st.markdown('##### Bar Chart of Document Types')
+        fig_bar = px.bar(type_counts, x='count', y='type_label', color='type_label',
+                     labels={'type_label': 'Document Type', 'count': 'Count'},
+                      text='count', width=1000,height=450)
+        fig_bar.update_traces(texttemplate='%{text}', textposition='outside')
+        st.plotly_chart(fig_bar)
+
+        col1, col2 = st.columns([6, 4], gap="medium")
+        with col1:
+            st.markdown('##### Document File Extensions')
+            # Count the frequency of each file extension
+            extension_counts = totals_frame(dimension_totals('file_extension'), 'File Extension', 'Count')
+
+            # Create a Bar Chart
+            fig_file_extension = px.bar(extension_counts, x='File Extension', y='Count', color='File Extension',
+                                     text='Count', width=600)
+            fig_file_extension.update_traces(texttemplate='%{text}', textposition='outside')
+            fig_file_extension.update_layout(bargap=0.5)
+            st.plotly_chart(fig_file_extension)
+
+        with col2:
+            st.markdown('##### Top documents')
+
+            # Only the ten largest document types are read from the local store, already sorted
+            top_documents_df = totals_frame(dimension_totals('document_type', limit=10), 'Document Type', 'Count')
+
+            # Check if DataFrame is empty before calculating max_count
+            if not top_documents_df.empty:
+                max_count = top_documents_df['Count'].max()
+            else:
+                max_count = 0  # Or any default value for an empty DataFrame
+
+            # Use st.data_editor to display the table with document type labels
+            st.data_editor(
+                top_documents_df,
+                column_order=("Document Type", "Count"),
+                column_config={
+                    "Document Type": st.column_config.TextColumn(
+                        "Document Types",  # Set the header text as "Document Types"
+                    ),
+                    "Count": st.column_config.ProgressColumn(
+                        "Number of Documents",
+                        format="%f",  # Display format for count
+                        min_value=float(0),
+                        max_value=float(max_count),
+                    ),
+                },
+                hide_index=True,  # Hide the index column
+            )
+
+    st.header('Document Growth Over Time')
+    first_day, last_day = day_range()
+    if first_day is not None:
+        #Document Growth Over Time:
+        # Determine the earliest and latest dates in the dataset
+        min_date = pd.Timestamp(first_day).date()
+        max_date = pd.Timestamp(last_day).date()
+
+        col1, col2 = st.columns([4,6])
+        with col2:
+            # User input for date range and view selection in the same column
+            col_start_date, col_end_date,col_empty_date = st.columns([3,3,4])
+            with col_start_date:
+                start_date = st.date_input("Start date", value=min_date, min_value=min_date, max_value=max_date)
+            with col_end_date:
+                end_date = st.date_input("End date", value=max_date, min_value=min_date, max_value=max_date)
+            growth_view = st.selectbox('Choose Data View', ['Document Types Growth Over Time', 'File Extension Growth Over Time'])
+
+            # Choose data view; growth is a range query over precomputed daily buckets plus a prefix sum
+            with timed_phase(VIEW, 'aggregate'):
+                if growth_view == 'Document Types Growth Over Time':
+                    df_plot = cumulative_growth(daily_counts('document_type', start_date, end_date))
+                    title = "Document Type Growth Over Time"
+                else:
+                    df_plot = cumulative_growth(daily_counts('file_extension', start_date, end_date))
+                    title = "File Extension Growth Over Time"
+
+            # Plotting
+            if not df_plot.empty:
+                # Series are capped and downsampled to the chart width before serializing
+                with timed_phase(VIEW, 'figure'):
+                    fig = growth_figure(df_plot, title, growth_view[:-16])
+                st.plotly_chart(fig)
+            else:
+                st.write("No data to display for the selected range.")
+
+        with col1:
+            selected_types = st.multiselect("Document types", sorted(value for value in dimension_totals('document_type') if value))
+            selected_extensions = st.multiselect("File extensions",
+                                                 sorted(value for value in dimension_totals('file_extension') if value))
+            # Extensions are filtered as the stored mimetypes they come from
+            selected_mimetypes = mimetypes_for_extensions(selected_extensions) if selected_extensions else None
+            # Filters are pushed down to the local store and only the visible page is sent to the browser
+            st.write("Filtered Documents:")
+            documents_table(DocumentFilter(start_date, end_date, selected_types or None, selected_mimetypes))
@@ -0,0 +1,34 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from dashboard_views.common import latest, urls
+from dms_client import fetch_all
+from hierarchy import walk_index_nodes
+from instrumentation import timed_phase
+
+VIEW = "Document Count by Index and Node Value"
+
+
+def load_index_trees():
+    # Walk each index's node tree breadth first, counting documents per node
+    node_counts = []
+    for index in fetch_all(urls['index_instances']):
+        node_counts.extend(walk_index_nodes(index))
+    return node_counts
+
+
+def render():
+    st.header('Document Count by Index and Node Value')
+    with timed_phase(VIEW, 'fetch'):
+        node_counts = latest("index_trees", load_index_trees) or []
+
+    # Convert to DataFrame
+    df_node_counts = pd.DataFrame(node_counts)
+
+    # Sunburst of the node hierarchy; a node's share is its own documents plus its children's
+    if not df_node_counts.empty:
+        with timed_phase(VIEW, 'figure'):
+            fig = px.sunburst(df_node_counts, ids='id', names='Node Value', parents='parent', values='Document Count',
+                              hover_data={'Index Label': True, 'Level': True}, height=600, width=900)
+        st.plotly_chart(fig)
@@ -0,0 +1,43 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from dashboard_views.common import latest, urls
+from dms_client import fetch_all
+from instrumentation import timed_phase
+from tag_index import build_tag_index
+
+VIEW = "Document Tags"
+
+
+def load_tags():
+    tags = fetch_all(urls['tags'])
+    # Tag counts and co-occurrence from one pass over synced documents, or count-only requests
+    return tags, build_tag_index(tags)
+
+
+def render():
+    st.header('Document Tags')
+    with timed_phase(VIEW, 'fetch'):
+        tags, tag_index = latest("tags", load_tags) or ([], None)
+    df_tags = pd.DataFrame(tags)
+    if not df_tags.empty:
+        df_tags['document_count'] = df_tags['id'].map(tag_index['counts']).fillna(0).astype(int)
+
+        # Bar Chart for Tags
+        with timed_phase(VIEW, 'figure'):
+            fig_tags = px.bar(df_tags, x='label', y='document_count', title="Documents by Tag",height=600, width=900,
+                            color='color', text='document_count')
+        fig_tags.update_layout(showlegend=False)  # Optional: Turn off the legend if color coding is sufficient
+        st.plotly_chart(fig_tags)
+
+        # Tag co-occurrence, only known when the synced documents carry their tags
+        if tag_index['cooccurrence']:
+            tag_labels = dict(zip(df_tags['id'], df_tags['label']))
+            df_pairs = pd.DataFrame(tag_index['cooccurrence'], columns=['tag_a', 'tag_b', 'count'])
+            df_pairs = pd.concat([df_pairs, df_pairs.rename(columns={'tag_a': 'tag_b', 'tag_b': 'tag_a'})])
+            df_pairs['tag_a'] = df_pairs['tag_a'].map(tag_labels)
+            df_pairs['tag_b'] = df_pairs['tag_b'].map(tag_labels)
+            matrix = df_pairs.pivot_table(index='tag_a', columns='tag_b', values='count', fill_value=0)
+            fig_pairs = px.imshow(matrix, title="Tag Co-occurrence", labels={'color': 'Documents'}, height=600, width=900)
+            st.plotly_chart(fig_pairs)
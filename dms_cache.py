@@ -0,0 +1,124 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from dms_client import fetch_counts
+
+DEFAULT_TTL = 600                     # seconds a dataset stays fresh
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # approximate memory cap for all entries
+_SIZE_SAMPLE = 200                    # records sampled when estimating a list's size
+
+
+def cache_key(endpoint_url, **params):
+    """Return a canonical key for an endpoint and query, independent of parameter order."""
+    parts = urlsplit(endpoint_url)
+    query = dict(parse_qsl(parts.query))
+    query.update({key: str(value) for key, value in params.items() if value is not None})
+    return urlunsplit(parts._replace(query=urlencode(sorted(query.items()))))
+
+
+def file_digest(data):
+    """Return a stable hash identifying an uploaded file's contents."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def estimate_size(value):
+    """Roughly estimate the memory held by decoded JSON, sampling long lists."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        if len(value) > _SIZE_SAMPLE:
+            sample = value[:_SIZE_SAMPLE]
+            return sys.getsizeof(value) + sum(estimate_size(v) for v in sample) * len(value) // _SIZE_SAMPLE
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe TTL cache with LRU eviction bounded by an approximate byte budget."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the fresh value for key, or default if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, size, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                self._drop(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size=None):
+        """Store value under key, evicting least recently used entries to stay in budget."""
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return  # Larger than the whole budget, not worth caching
+            self._entries[key] = (value, size, time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() and caching its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def age(self, key):
+        """Return the age in seconds of the entry for key, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else time.time() - entry[2]
+
+    def invalidate(self, prefix=None):
+        """Drop every entry, or only those whose key starts with prefix."""
+        with self._lock:
+            keys = [key for key in self._entries if prefix is None or key.startswith(prefix)]
+            for key in keys:
+                self._drop(key)
+
+    def stats(self):
+        """Return the number of entries and the approximate bytes they hold."""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+_MISSING = object()
+
+# Process-wide cache shared by every session and rerun
+cache = ResultCache()
+
+
+def cached_fetch_counts(endpoint_urls):
+    """Return the counts of several endpoints, fetching only the uncached ones concurrently."""
+    keys = ['count:' + cache_key(url) for url in endpoint_urls]
+    counts = [cache.get(key) for key in keys]
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if missing:
+        fetched = fetch_counts([endpoint_urls[i] for i in missing])
+        for i, count in zip(missing, fetched):
+            cache.set(keys[i], count)
+            counts[i] = count
+    return counts
@@ -0,0 +1,178 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from instrumentation import record_request
+
+# Root of the DMS REST API; override with DMS_API_ROOT, e.g. to point at the benchmark mock
+API_ROOT = os.environ.get('DMS_API_ROOT', 'https://sagawa.epik.live/api/v4/')
+
+# Basic Authentication shared by every call to the DMS API
+auth = HTTPBasicAuth('admin', 'JzWnZGWASr2Qnf@cM8jT')
+
+# Fetch engine settings
+MAX_WORKERS = 8          # concurrent page requests per crawl
+MAX_RETRIES = 3          # retries after the first attempt
+BACKOFF_FACTOR = 0.5     # seconds, doubled on every retry
+TIMEOUT = 30             # seconds per request
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+PAGE_CACHE_BYTES = 256 * 1024 * 1024  # page bodies kept for conditional requests
+
+_session = None
+_pages = OrderedDict()  # url -> (conditional request headers, body)
+_pages_bytes = 0
+_pages_lock = threading.Lock()
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be fetched from the DMS API."""
+
+    def __init__(self, url, status):
+        super().__init__(f"Failed to fetch data from {url}: Status {status}")
+        self.url = url
+        self.status = status
+
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        session.auth = auth
+        session.headers['Accept-Encoding'] = 'gzip, deflate'
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+
+def with_params(url, **params):
+    """Return url with the given query parameters set; None values are left out."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({key: str(value) for key, value in params.items() if value is not None})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _cached_page(url):
+    with _pages_lock:
+        entry = _pages.get(url)
+        if entry is not None:
+            _pages.move_to_end(url)
+        return entry
+
+
+def _store_page(url, response):
+    """Keep a page body with its ETag and Last-Modified validators, evicting the oldest pages."""
+    global _pages_bytes
+    headers = {}
+    if response.headers.get('ETag'):
+        headers['If-None-Match'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        headers['If-Modified-Since'] = response.headers['Last-Modified']
+    with _pages_lock:
+        previous = _pages.pop(url, None)
+        if previous is not None:
+            _pages_bytes -= len(previous[1])
+        if not headers or len(response.content) > PAGE_CACHE_BYTES:
+            return
+        _pages[url] = (headers, response.content)
+        _pages_bytes += len(response.content)
+        while _pages_bytes > PAGE_CACHE_BYTES:
+            _, (_, body) = _pages.popitem(last=False)
+            _pages_bytes -= len(body)
+
+
+def clear_page_cache():
+    """Forget every cached page body and validator."""
+    global _pages_bytes
+    with _pages_lock:
+        _pages.clear()
+        _pages_bytes = 0
+
+
+def _wire_size(response):
+    # Content-Length counts the compressed body; response.content is already decoded
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else len(response.content)
+
+
+def get_json(url):
+    """GET a URL and return its JSON body, retrying transient failures with backoff.
+
+    Pages are requested conditionally with the validators of the last copy
+    received, so an unchanged page costs a 304 and its cached body is reused.
+    """
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        cached = _cached_page(url)
+        started = time.perf_counter()
+        try:
+            response = session.get(url, headers=cached[0] if cached else None, timeout=TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            record_request('GET', url, e.__class__.__name__, time.perf_counter() - started, 0)
+            if attempt == MAX_RETRIES:
+                raise FetchError(url, e.__class__.__name__) from e
+        else:
+            record_request('GET', url, response.status_code, time.perf_counter() - started, _wire_size(response))
+            if response.status_code == 304 and cached is not None:
+                return json.loads(cached[1])
+            if response.status_code == 200:
+                _store_page(url, response)
+                return response.json()
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                raise FetchError(url, response.status_code)
+        time.sleep(BACKOFF_FACTOR * (2 ** attempt))
+
+
+def fetch_all(endpoint_url, max_workers=MAX_WORKERS, page_size=None):
+    """Fetch every page of a paginated endpoint and return the results in order.
+
+    The first page is fetched on its own to learn ``count`` and the page size;
+    the remaining page URLs are then derived and fetched concurrently.
+    """
+    first_url = with_params(endpoint_url, page_size=page_size)
+    first = get_json(first_url)
+    results = list(first['results'])
+    if not first.get('next'):
+        return results
+
+    count = first.get('count')
+    per_page = len(first['results'])
+    if count is None or not per_page:
+        # Not a page-numbered endpoint, fall back to following the next links
+        next_url = first['next']
+        while next_url:
+            data = get_json(next_url)
+            results.extend(data['results'])
+            next_url = data['next']
+        return results
+
+    total_pages = math.ceil(count / per_page)
+    page_urls = [with_params(first_url, page=page) for page in range(2, total_pages + 1)]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        # map() yields in submission order, so pages come back in sequence
+        for data in pool.map(get_json, page_urls):
+            results.extend(data['results'])
+    return results
+
+
+def fetch_count(endpoint_url):
+    """Return the ``count`` of a paginated endpoint, requesting a single one-item page."""
+    return get_json(with_params(endpoint_url, page_size=1))['count']
+
+
+def fetch_counts(endpoint_urls, max_workers=MAX_WORKERS):
+    """Return the counts of several endpoints, fetched concurrently and in input order."""
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return list(pool.map(fetch_count, endpoint_urls))
@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from dms_client import fetch_all, with_params
+from document_store import count_document_rows, last_sync, query_document_rows
+from normalize import frame_from_rows, normalize_documents
+
+# Query parameters the documents endpoint accepts for each filter. Mayan's document
+# list has no date, type or mimetype filters, so none are pushed to the API by default;
+# add entries here for a server that supports them.
+API_FILTER_PARAMS = {}
+
+
+class DocumentFilter:
+    """Dashboard filters on documents: an inclusive creation day range, document types,
+    mimetypes and a case-insensitive label search."""
+
+    def __init__(self, start=None, end=None, document_types=None, mimetypes=None, search=None):
+        self.start = start
+        self.end = end
+        self.document_types = list(document_types) if document_types is not None else None
+        self.mimetypes = list(mimetypes) if mimetypes is not None else None
+        self.search = search or None
+
+    def store_arguments(self):
+        return {'start': self.start, 'end': self.end, 'document_types': self.document_types,
+                'mimetypes': self.mimetypes, 'search': self.search}
+
+    def items(self):
+        """Return (name, value) for every filter that is set."""
+        return [(name, value) for name, value in vars(self).items() if value is not None]
+
+
+def api_url(endpoint_url, filters):
+    """Return the documents URL with every filter the API supports pushed into its query."""
+    params = {}
+    for name, value in filters.items():
+        if name in API_FILTER_PARAMS:
+            params[API_FILTER_PARAMS[name]] = ','.join(value) if isinstance(value, list) else str(value)
+    return with_params(endpoint_url, **params)
+
+
+def apply_filters(df, filters):
+    """Filter a normalized document frame in pandas, for backends that cannot filter."""
+    mask = pd.Series(True, index=df.index)
+    if filters.start is not None:
+        mask &= df['date'] >= pd.Timestamp(filters.start)
+    if filters.end is not None:
+        mask &= df['date'] < pd.Timestamp(date.fromisoformat(str(filters.end)) + timedelta(days=1))
+    if filters.document_types is not None:
+        mask &= df['document_type'].isin(filters.document_types)
+    if filters.mimetypes is not None:
+        mask &= df['mimetype'].isin(filters.mimetypes)
+    if filters.search is not None:
+        mask &= df['label'].str.contains(filters.search, case=False, regex=False, na=False)
+    return df[mask]
+
+
+def query_documents(filters, endpoint_url):
+    """Return the normalized frame of the documents matching filters, filtered as close to the data as possible.
+
+    Once the local store has been synced, every filter runs in SQL and only
+    the matching rows are read. Otherwise the documents are fetched with the
+    filters the API supports pushed into the query, and all filters are
+    applied again to the frame in case the server ignored any of them.
+    """
+    if last_sync() is not None:
+        return frame_from_rows(query_document_rows(**filters.store_arguments()))
+    return apply_filters(normalize_documents(fetch_all(api_url(endpoint_url, filters))), filters)
+
+
+def query_page(filters, endpoint_url, sort='datetime_created', descending=False, page=1, page_size=50):
+    """Return one sorted page of the matching documents as a normalized frame, and the number of matches.
+
+    The synced store sorts and pages in SQL, so only the rows of the page are
+    read; the fallback sorts and slices the filtered frame.
+    """
+    offset = (page - 1) * page_size
+    if last_sync() is not None:
+        total = count_document_rows(**filters.store_arguments())
+        rows = query_document_rows(**filters.store_arguments(), order_by=sort, descending=descending,
+                                   limit=page_size, offset=offset)
+        return frame_from_rows(rows), total
+    df = query_documents(filters, endpoint_url)
+    df = df.sort_values([sort, 'id'], ascending=not descending, kind='stable')
+    return df.iloc[offset:offset + page_size], len(df)
@@ -0,0 +1,371 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+from dms_client import fetch_all, get_json, with_params
+
+# Local SQLite copy of the DMS document collection
+STORE_PATH = os.environ.get('DMS_STORE_PATH', 'dms_store.sqlite3')
+SYNC_PAGE_SIZE = 100
+# Hours between full resyncs, which pick up edits to documents older than the high-water mark
+FULL_SYNC_HOURS = float(os.environ.get('DMS_FULL_SYNC_HOURS', 24))
+ORDERING_PARAM = '_ordering'  # Mayan's ordering query parameter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    label TEXT,
+    document_type_label TEXT,
+    mimetype TEXT,
+    created_day TEXT,
+    created_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at);
+CREATE TABLE IF NOT EXISTS document_tags (
+    document_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    PRIMARY KEY (document_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS document_tags_tag ON document_tags (tag_id);
+CREATE TABLE IF NOT EXISTS daily_counts (
+    day TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, day, value)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def connect(path=None):
+    """Open the local store, creating its tables on first use."""
+    connection = sqlite3.connect(path or STORE_PATH, timeout=30)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.executescript(SCHEMA)
+    _migrate(connection)
+    return connection
+
+
+def _migrate(connection):
+    # Stores written before created_day existed get it from the stored payloads, and their counts rebuilt
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(documents)')}
+    if 'created_day' not in columns:
+        with connection:
+            connection.execute('ALTER TABLE documents ADD COLUMN created_day TEXT')
+            connection.execute(
+                "UPDATE documents SET created_day = substr(json_extract(payload, '$.datetime_created'), 1, 10)")
+            rebuild_aggregates(connection)
+    connection.execute('CREATE INDEX IF NOT EXISTS documents_created_day ON documents (created_day)')
+
+
+def to_utc(timestamp):
+    """Normalize an API timestamp to a sortable UTC ISO string."""
+    parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def local_day(timestamp):
+    """Return the ISO day of an API timestamp in the server's own time zone, as the dashboard shows it."""
+    return timestamp[:10]
+
+
+def document_row(document):
+    """Return the (id, label, document type, mimetype, created, created day) row of an API document."""
+    document_type = document.get('document_type')
+    file_latest = document.get('file_latest')
+    return (
+        document['id'],
+        document.get('label'),
+        document_type.get('label') if isinstance(document_type, dict) else None,
+        file_latest.get('mimetype') if isinstance(file_latest, dict) else None,
+        to_utc(document['datetime_created']),
+        local_day(document['datetime_created']),
+    )
+
+
+def _row(document):
+    return document_row(document) + (json.dumps(document),)
+
+
+def get_state(connection, key):
+    row = connection.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state(connection, key, value):
+    connection.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+
+def file_extension(mimetype):
+    """Return the upper-cased file extension the dashboard shows for a mimetype."""
+    return mimetype.split('/')[-1].upper() if mimetype else None
+
+
+def _bucket_rows(rows):
+    # (day, dimension, value) buckets for document_row() rows
+    buckets = {}
+    for row in rows:
+        day = row[5]
+        for dimension, value in (('document_type', row[2]), ('file_extension', file_extension(row[3]))):
+            key = (day, dimension, value or '')
+            buckets[key] = buckets.get(key, 0) + 1
+    return buckets
+
+
+def _apply_buckets(connection, buckets, sign):
+    connection.executemany(
+        'INSERT INTO daily_counts (day, dimension, value, count) VALUES (?, ?, ?, ?) '
+        'ON CONFLICT (dimension, day, value) DO UPDATE SET count = count + excluded.count',
+        [(day, dimension, value, sign * count) for (day, dimension, value), count in buckets.items()])
+    connection.execute('DELETE FROM daily_counts WHERE count <= 0')
+
+
+def rebuild_aggregates(connection):
+    """Recompute the per-day document type and file extension counts from the stored documents."""
+    connection.execute('DELETE FROM daily_counts')
+    rows = connection.execute(
+        'SELECT id, label, document_type_label, mimetype, created_at, created_day FROM documents')
+    _apply_buckets(connection, _bucket_rows(rows), 1)
+    set_state(connection, 'aggregates', 'built')
+
+
+def _tag_rows(document):
+    # Tags are only present when the API embeds them in the document record
+    tags = document.get('tags')
+    if not isinstance(tags, list):
+        return []
+    return [(document['id'], tag['id'] if isinstance(tag, dict) else tag) for tag in tags]
+
+
+def upsert_documents(connection, documents):
+    """Insert or update documents, their tag links and the daily counts, returning how many were written."""
+    rows = [_row(document) for document in documents]
+    # Take replaced documents out of the daily counts before adding the new versions back in
+    previous = []
+    for start in range(0, len(rows), 500):
+        ids = [row[0] for row in rows[start:start + 500]]
+        previous.extend(connection.execute(
+            'SELECT id, label, document_type_label, mimetype, created_at, created_day FROM documents '
+            f'WHERE id IN ({",".join("?" * len(ids))})', ids).fetchall())
+    _apply_buckets(connection, _bucket_rows(previous), -1)
+    _apply_buckets(connection, _bucket_rows(rows), 1)
+    connection.executemany(
+        'INSERT OR REPLACE INTO documents '
+        '(id, label, document_type_label, mimetype, created_at, created_day, payload) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    connection.executemany('DELETE FROM document_tags WHERE document_id = ?', [(row[0],) for row in rows])
+    connection.executemany('INSERT OR IGNORE INTO document_tags (document_id, tag_id) VALUES (?, ?)',
+                           [link for document in documents for link in _tag_rows(document)])
+    return len(rows)
+
+
+def _fetch_newer(endpoint_url, high_water):
+    """Walk the collection newest first and return the documents created at or after high_water.
+
+    Returns None when the server does not honour the ordering, so the caller
+    can fall back to a full sync.
+    """
+    newer = []
+    next_url = with_params(endpoint_url, page_size=SYNC_PAGE_SIZE, **{ORDERING_PARAM: '-datetime_created'})
+    previous = None
+    while next_url:
+        data = get_json(next_url)
+        for document in data['results']:
+            created_at = to_utc(document['datetime_created'])
+            if previous is not None and created_at > previous:
+                return None  # Not newest first
+            previous = created_at
+            if created_at < high_water:
+                return newer
+            newer.append(document)
+        next_url = data['next']
+    return newer
+
+
+def _full_sync_due(connection, now):
+    last_full = get_state(connection, 'last_full')
+    return last_full is None or now - datetime.fromisoformat(last_full) >= timedelta(hours=FULL_SYNC_HOURS)
+
+
+def sync_documents(endpoint_url, full=False, path=None):
+    """Bring the local store up to date with the API and return the number of records written.
+
+    Incremental runs only pull documents created since the stored high-water
+    mark. The API cannot filter on modification time, so edits to older
+    documents and deletions are reconciled with a full sync, which runs when
+    full is set, every FULL_SYNC_HOURS, and whenever the local and remote
+    totals disagree after the incremental pass.
+    """
+    now = datetime.now(timezone.utc)
+    with closing(connect(path)) as connection:
+        high_water = get_state(connection, 'high_water')
+        full = full or not high_water or _full_sync_due(connection, now)
+        written = 0
+        if not full:
+            newer = _fetch_newer(endpoint_url, high_water)
+            if newer is None:
+                full = True
+            else:
+                with connection:
+                    written = upsert_documents(connection, newer)
+                remote_count = get_json(with_params(endpoint_url, page_size=1))['count']
+                local_count = connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+                full = remote_count != local_count
+
+        if full:
+            documents = fetch_all(endpoint_url, page_size=SYNC_PAGE_SIZE)
+            with connection:
+                connection.execute('DELETE FROM documents')
+                connection.execute('DELETE FROM document_tags')
+                connection.execute('DELETE FROM daily_counts')
+                written = upsert_documents(connection, documents)
+                set_state(connection, 'last_full', now.isoformat())
+
+        with connection:
+            if get_state(connection, 'aggregates') is None:
+                rebuild_aggregates(connection)
+            latest = connection.execute('SELECT MAX(created_at) FROM documents').fetchone()[0]
+            if latest:
+                set_state(connection, 'high_water', latest)
+            set_state(connection, 'last_sync', now.isoformat())
+        return written
+
+
+# Sortable document columns, by their name in the normalized frame
+SORT_COLUMNS = {
+    'id': 'id',
+    'label': 'label',
+    'document_type': 'document_type_label',
+    'mimetype': 'mimetype',
+    'datetime_created': 'created_at',
+}
+
+
+def _where(start, end, document_types, mimetypes, search):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append('created_day >= ?')
+        params.append(str(start))
+    if end is not None:
+        clauses.append('created_day <= ?')
+        params.append(str(end))
+    for column, values in (('document_type_label', document_types), ('mimetype', mimetypes)):
+        if values is not None:
+            values = list(values)
+            clauses.append(f'{column} IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+    if search:
+        escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.append("label LIKE ? ESCAPE '\\'")
+        params.append(f'%{escaped}%')
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+def query_document_rows(start=None, end=None, document_types=None, mimetypes=None, search=None,
+                        order_by='datetime_created', descending=False, limit=None, offset=0, path=None):
+    """Return (id, label, document type, mimetype, created, created day) for the matching stored documents.
+
+    created is the UTC creation time; created day is the day it falls on in
+    the server's time zone. Rows are filtered, sorted and paged in SQL.
+    start and end are inclusive creation days; document_types and mimetypes
+    are collections of allowed values; search matches part of the label,
+    ignoring case. order_by is one of SORT_COLUMNS.
+    """
+    where, params = _where(start, end, document_types, mimetypes, search)
+    direction = 'DESC' if descending else 'ASC'
+    query = (f'SELECT id, label, document_type_label, mimetype, created_at, created_day FROM documents{where} '
+             f'ORDER BY {SORT_COLUMNS[order_by]} {direction}, id {direction}')
+    if limit is not None:
+        query += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    with closing(connect(path)) as connection:
+        return connection.execute(query, params).fetchall()
+
+
+def count_document_rows(start=None, end=None, document_types=None, mimetypes=None, search=None, path=None):
+    """Return the number of stored documents matching the query_document_rows() filters."""
+    where, params = _where(start, end, document_types, mimetypes, search)
+    with closing(connect(path)) as connection:
+        return connection.execute(f'SELECT COUNT(*) FROM documents{where}', params).fetchone()[0]
+
+
+def mimetypes_for_extensions(extensions, path=None):
+    """Return the stored mimetypes whose file_extension() is one of extensions."""
+    wanted = set(extensions)
+    with closing(connect(path)) as connection:
+        rows = connection.execute('SELECT DISTINCT mimetype FROM documents WHERE mimetype IS NOT NULL')
+        return sorted(mimetype for (mimetype,) in rows if file_extension(mimetype) in wanted)
+
+
+def document_count(path=None):
+    """Return the number of stored documents."""
+    with closing(connect(path)) as connection:
+        return connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+
+def last_sync(path=None):
+    """Return the time of the last successful sync as an ISO string, or None."""
+    with closing(connect(path)) as connection:
+        return get_state(connection, 'last_sync')
+
+
+def tag_counts(path=None):
+    """Return {tag_id: document count} from the synced tag links; empty if none were synced."""
+    with closing(connect(path)) as connection:
+        rows = connection.execute('SELECT tag_id, COUNT(*) FROM document_tags GROUP BY tag_id')
+        return dict(rows.fetchall())
+
+
+def tag_cooccurrence(path=None):
+    """Return (tag_a, tag_b, shared documents) for every pair of tags used together."""
+    with closing(connect(path)) as connection:
+        rows = connection.execute(
+            'SELECT a.tag_id, b.tag_id, COUNT(*) FROM document_tags a '
+            'JOIN document_tags b ON a.document_id = b.document_id AND a.tag_id < b.tag_id '
+            'GROUP BY a.tag_id, b.tag_id')
+        return rows.fetchall()
+
+
+def daily_counts(dimension, start=None, end=None, path=None):
+    """Return (day, value, count) buckets for a dimension, optionally limited to a day range."""
+    query = 'SELECT day, value, count FROM daily_counts WHERE dimension = ?'
+    params = [dimension]
+    if start is not None:
+        query += ' AND day >= ?'
+        params.append(str(start))
+    if end is not None:
+        query += ' AND day <= ?'
+        params.append(str(end))
+    with closing(connect(path)) as connection:
+        return connection.execute(query + ' ORDER BY day', params).fetchall()
+
+
+def dimension_totals(dimension, limit=None, path=None):
+    """Return {value: document count} over all days for a dimension.
+
+    With a limit, only the most frequent non-empty values are returned, largest first.
+    """
+    query = 'SELECT value, SUM(count) AS total FROM daily_counts WHERE dimension = ?'
+    params = [dimension]
+    if limit is not None:
+        query += " AND value != '' GROUP BY value ORDER BY total DESC LIMIT ?"
+        params.append(limit)
+    else:
+        query += ' GROUP BY value'
+    with closing(connect(path)) as connection:
+        return dict(connection.execute(query, params).fetchall())
+
+
+def day_range(path=None):
+    """Return the first and last day with documents as ISO date strings, or (None, None)."""
+    with closing(connect(path)) as connection:
+        return connection.execute('SELECT MIN(day), MAX(day) FROM daily_counts').fetchone()
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from dms_client import MAX_WORKERS, fetch_all, fetch_count
+
+ROOT_LABEL = "All Cabinets"
+PATH_SEPARATOR = ' / '
+
+
+def build_cabinet_tree(cabinets, document_counts):
+    """Return treemap nodes (id, parent, label, document_count) for every cabinet level.
+
+    Each cabinet's ``full_path`` is used as its id, so cabinets with the same
+    label under different parents stay apart. Ancestors missing from the
+    list are added with no documents of their own, and every top-level
+    cabinet hangs off a single root node.
+    """
+    nodes = {ROOT_LABEL: {'id': ROOT_LABEL, 'parent': '', 'label': ROOT_LABEL, 'document_count': 0}}
+    for cabinet, document_count in zip(cabinets, document_counts):
+        parts = cabinet['full_path'].split(PATH_SEPARATOR)
+        parent_id = ROOT_LABEL
+        for depth in range(1, len(parts) + 1):
+            node_id = PATH_SEPARATOR.join(parts[:depth])
+            if node_id not in nodes:
+                nodes[node_id] = {'id': node_id, 'parent': parent_id, 'label': parts[depth - 1], 'document_count': 0}
+            parent_id = node_id
+        nodes[parent_id]['document_count'] = document_count
+    return list(nodes.values())
+
+
+def _fetch_node_list(nodes_url):
+    # Each worker fetches its own list serially; the traversal pool bounds concurrency
+    return fetch_all(nodes_url, max_workers=1)
+
+
+def walk_index_nodes(index, max_workers=MAX_WORKERS):
+    """Walk an index instance's node tree breadth first and return one record per node.
+
+    Every level is handled as a batch: the node lists of the level are
+    fetched concurrently, then each node's documents are counted with a
+    count-only request instead of downloading the document pages. Records
+    carry ``id`` and ``parent`` so the tree can be charted as a hierarchy.
+    """
+    index_id = f"index:{index['id']}"
+    records = [{'id': index_id, 'parent': '', 'Index Label': index['label'],
+                'Node Value': index['label'], 'Level': 0, 'Document Count': 0}]
+    frontier = [(index['nodes_url'], index_id)]
+    level = 1
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while frontier:
+            node_lists = list(pool.map(_fetch_node_list, [url for url, _ in frontier]))
+            level_nodes = [(node, parent_id)
+                           for (_, parent_id), nodes in zip(frontier, node_lists)
+                           for node in nodes]
+            counts = list(pool.map(fetch_count, [node['documents_url'] for node, _ in level_nodes]))
+
+            frontier = []
+            for (node, parent_id), document_count in zip(level_nodes, counts):
+                node_id = f"{index_id}:{node['id']}"
+                records.append({'id': node_id, 'parent': parent_id, 'Index Label': index['label'],
+                                'Node Value': node['value'], 'Level': level, 'Document Count': document_count})
+                if node.get('children_url'):
+                    frontier.append((node['children_url'], node_id))
+            level += 1
+    return records
@@ -0,0 +1,114 @@
+import io
+import math
+
+from PIL import Image, ImageFilter
+
+from dms_cache import ResultCache
+
+TILE_SIZE = 512  # pixels per side of a pyramid tile
+
+# Image sizes, previews, pyramid tiles and zoomed regions keyed by file hash, bounded by pixel memory
+image_cache = ResultCache(ttl=3600, max_bytes=256 * 1024 * 1024)
+
+
+def _pixels_size(img):
+    return img.width * img.height * len(img.getbands())
+
+
+def _cached(key, render):
+    img = image_cache.get(key)
+    if img is None:
+        img = render()
+        image_cache.set(key, img, size=_pixels_size(img))
+    return img
+
+
+def image_info(data, digest):
+    """Return (width, height) of an image, read from its header without decoding the pixels."""
+    def load():
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    return image_cache.get_or_load(('info', digest), load)
+
+
+def _decode(data, scale):
+    """Decode an image shrunk by an integer factor, letting the decoder skip as much work as it can."""
+    img = Image.open(io.BytesIO(data))
+    target = (max(1, img.width // scale), max(1, img.height // scale))
+    # JPEG decodes straight to 1/2, 1/4 or 1/8 scale; other formats reduce by block averaging
+    img.draft('RGB', target)
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    factor = min(img.width // target[0], img.height // target[1])
+    if factor > 1:
+        img = img.reduce(factor)
+    if img.size != target:
+        img = img.resize(target, Image.LANCZOS)
+    return img
+
+
+def level_count(width, height):
+    """Return the number of pyramid levels; level n is the image shrunk by 2 ** n."""
+    return max(1, math.ceil(math.log2(max(width, height, TILE_SIZE) / TILE_SIZE)) + 1)
+
+
+def tiles(data, digest, level, positions):
+    """Return {(column, row): tile} for tiles of one pyramid level, decoding the level at most once.
+
+    Cached tiles are reused; the missing ones are all cut from a single
+    decode of the level, and only those are added to the cache.
+    """
+    found = {}
+    for position in positions:
+        img = image_cache.get((digest, 'tile', level) + position)
+        if img is not None:
+            found[position] = img
+    missing = [position for position in positions if position not in found]
+    if missing:
+        img = _decode(data, 2 ** level)
+        for column, row in missing:
+            left, top = column * TILE_SIZE, row * TILE_SIZE
+            piece = img.crop((left, top, min(left + TILE_SIZE, img.width), min(top + TILE_SIZE, img.height)))
+            image_cache.set((digest, 'tile', level, column, row), piece, size=_pixels_size(piece))
+            found[(column, row)] = piece
+    return found
+
+
+def preview(data, digest, width_px):
+    """Return the whole image shrunk to at most width_px wide and sharpened, cached per file and width."""
+    def render():
+        width, _ = image_info(data, digest)
+        img = _decode(data, max(1, width // width_px))
+        if img.width > width_px:
+            img = img.resize((width_px, max(1, round(img.height * width_px / img.width))), Image.LANCZOS)
+        return img.filter(ImageFilter.SHARPEN)
+    return _cached((digest, 'preview', width_px), render)
+
+
+def render_region(data, digest, box, width_px):
+    """Return the (left, top, right, bottom) region of the full-size image at about width_px wide, sharpened.
+
+    The region is assembled from tiles of the coarsest pyramid level that
+    still has width_px pixels across it, so only the pixels shown are
+    decoded at full detail and sharpened.
+    """
+    def render():
+        width, height = image_info(data, digest)
+        left, top, right, bottom = box
+        level = min(int(math.log2(max(1, (right - left) / width_px))), level_count(width, height) - 1)
+        scale = 2 ** level
+        level_width, level_height = max(1, width // scale), max(1, height // scale)
+        l, t = left // scale, top // scale
+        r = min(level_width, max(l + 1, math.ceil(right / scale)))
+        b = min(level_height, max(t + 1, math.ceil(bottom / scale)))
+
+        positions = [(column, row) for row in range(t // TILE_SIZE, (b - 1) // TILE_SIZE + 1)
+                     for column in range(l // TILE_SIZE, (r - 1) // TILE_SIZE + 1)]
+        pieces = tiles(data, digest, level, positions)
+        region = Image.new(pieces[positions[0]].mode, (r - l, b - t))
+        for column, row in positions:
+            region.paste(pieces[(column, row)], (column * TILE_SIZE - l, row * TILE_SIZE - t))
+        if region.width > width_px:
+            region = region.resize((width_px, max(1, round(region.height * width_px / region.width))), Image.LANCZOS)
+        return region.filter(ImageFilter.SHARPEN)
+    return _cached((digest, 'region', tuple(box), width_px), render)
@@ -0,0 +1,150 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlsplit
+
+MAX_RECORDS = 5000  # most recent requests and phase timings kept in memory
+
+_requests = deque(maxlen=MAX_RECORDS)
+_phases = deque(maxlen=MAX_RECORDS)
+_lock = threading.Lock()
+
+
+def endpoint_of(url):
+    """Return the URL path with numeric ids replaced, so requests group by endpoint."""
+    return re.sub(r'/\d+(?=/|$)', '/{id}', urlsplit(url).path)
+
+
+def record_request(method, url, status, seconds, size):
+    """Record one HTTP request; status is the response code or the exception name."""
+    query = dict(parse_qsl(urlsplit(url).query))
+    with _lock:
+        _requests.append({
+            'time': time.time(),
+            'method': method,
+            'endpoint': endpoint_of(url),
+            'url': url,
+            'status': status,
+            'seconds': seconds,
+            'bytes': size,
+            'page': int(query['page']) if query.get('page', '').isdigit() else 1,
+        })
+
+
+def record_phase(view, phase, seconds):
+    """Record the duration of one phase of a view."""
+    with _lock:
+        _phases.append({'time': time.time(), 'view': view, 'phase': phase, 'seconds': seconds})
+
+
+@contextmanager
+def timed_phase(view, phase):
+    """Time a block of a view (import, fetch, normalize, aggregate or figure) and record it."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(view, phase, time.perf_counter() - started)
+
+
+def request_records():
+    with _lock:
+        return list(_requests)
+
+
+def phase_records():
+    with _lock:
+        return list(_phases)
+
+
+def clear():
+    """Forget every recorded request and phase timing."""
+    with _lock:
+        _requests.clear()
+        _phases.clear()
+
+
+def to_json_lines():
+    """Export the recorded requests and phase timings as JSON lines."""
+    lines = [json.dumps({'type': 'request', **record}) for record in request_records()]
+    lines += [json.dumps({'type': 'phase', **record}) for record in phase_records()]
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def to_prometheus():
+    """Export request and phase totals in the Prometheus text exposition format."""
+    requests_total, request_seconds, response_bytes = {}, {}, {}
+    for record in request_records():
+        key = (record['method'], record['endpoint'], str(record['status']))
+        requests_total[key] = requests_total.get(key, 0) + 1
+        request_seconds[key] = request_seconds.get(key, 0.0) + record['seconds']
+        response_bytes[key] = response_bytes.get(key, 0) + record['bytes']
+    phase_count, phase_seconds = {}, {}
+    for record in phase_records():
+        key = (record['view'], record['phase'])
+        phase_count[key] = phase_count.get(key, 0) + 1
+        phase_seconds[key] = phase_seconds.get(key, 0.0) + record['seconds']
+
+    lines = [
+        '# HELP dms_http_requests_total HTTP requests made to the DMS API.',
+        '# TYPE dms_http_requests_total counter',
+    ]
+    for (method, endpoint, status), value in requests_total.items():
+        lines.append(f'dms_http_requests_total{{{_labels(method=method, endpoint=endpoint, status=status)}}} {value}')
+    lines += ['# HELP dms_http_request_seconds_total Time spent in DMS API requests.',
+              '# TYPE dms_http_request_seconds_total counter']
+    for (method, endpoint, status), value in request_seconds.items():
+        lines.append(f'dms_http_request_seconds_total{{{_labels(method=method, endpoint=endpoint, status=status)}}} '
+                     f'{value:.6f}')
+    lines += ['# HELP dms_http_bytes_total Bytes transferred to or from the DMS API.',
+              '# TYPE dms_http_bytes_total counter']
+    for (method, endpoint, status), value in response_bytes.items():
+        lines.append(f'dms_http_bytes_total{{{_labels(method=method, endpoint=endpoint, status=status)}}} {value}')
+    lines += ['# HELP dms_view_phase_seconds Time spent in each phase of a dashboard view.',
+              '# TYPE dms_view_phase_seconds summary']
+    for (view, phase), value in phase_seconds.items():
+        labels = _labels(view=view, phase=phase)
+        lines.append(f'dms_view_phase_seconds_sum{{{labels}}} {value:.6f}')
+        lines.append(f'dms_view_phase_seconds_count{{{labels}}} {phase_count[(view, phase)]}')
+    return '\n'.join(lines) + '\n'
+
+
+def diagnostics_panel():
+    """Render the optional diagnostics panel in the Streamlit sidebar."""
+    import streamlit as st
+
+    if not st.sidebar.checkbox("Show diagnostics", key='show_diagnostics'):
+        return
+    import pandas as pd  # Only loaded once the panel is shown
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        requests_df = pd.DataFrame(request_records())
+        if not requests_df.empty:
+            requests_df['status'] = requests_df['status'].astype(str)
+            st.markdown("**Requests by endpoint**")
+            summary = requests_df.groupby('endpoint').agg(
+                requests=('seconds', 'size'), p50_s=('seconds', 'median'),
+                p95_s=('seconds', lambda s: s.quantile(0.95)), mb=('bytes', lambda b: b.sum() / 1e6))
+            st.dataframe(summary.round(3))
+            st.markdown("**Recent requests**")
+            st.dataframe(requests_df[['endpoint', 'status', 'seconds', 'bytes', 'page']].tail(50).iloc[::-1].round(3),
+                         hide_index=True)
+        phases_df = pd.DataFrame(phase_records())
+        if not phases_df.empty:
+            st.markdown("**View phases (latest run, seconds)**")
+            latest = phases_df.groupby(['view', 'phase'], sort=False)['seconds'].last().unstack()
+            st.dataframe(latest.round(3))
+        st.download_button("Prometheus metrics", to_prometheus(), file_name="dms_metrics.prom", mime="text/plain")
+        st.download_button("JSON lines", to_json_lines(), file_name="dms_metrics.jsonl", mime="application/json")
+        if st.button("Clear diagnostics"):
+            clear()
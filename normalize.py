@@ -0,0 +1,30 @@
+import pandas as pd
+
+from document_store import document_row, file_extension
+
+# Columns the dashboard views use, in the order of document_store.document_row()
+DOCUMENT_COLUMNS = ['id', 'label', 'document_type', 'mimetype', 'datetime_created', 'date']
+
+
+def frame_from_rows(rows):
+    """Build the normalized document frame from (id, label, document type, mimetype, created, day) rows.
+
+    Document types, mimetypes and file extensions are stored as categoricals
+    and the creation time as UTC datetime64, with ``date`` holding the day it
+    falls on in the server's time zone. The extension is derived once per
+    distinct mimetype rather than once per row.
+    """
+    df = pd.DataFrame.from_records(rows, columns=DOCUMENT_COLUMNS)
+    df['id'] = df['id'].astype('int64')
+    df['document_type'] = df['document_type'].astype('category')
+    df['mimetype'] = df['mimetype'].astype('category')
+    extensions = {mimetype: file_extension(mimetype) for mimetype in df['mimetype'].cat.categories}
+    df['file_extension'] = df['mimetype'].map(extensions).astype('category')
+    df['datetime_created'] = pd.to_datetime(df['datetime_created'], utc=True, format='ISO8601')
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    return df
+
+
+def normalize_documents(documents):
+    """Flatten API document records into the normalized frame, dropping the nested payloads."""
+    return frame_from_rows([document_row(document) for document in documents])
@@ -0,0 +1,133 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageChops, ImageOps
+
+from dms_cache import ResultCache, file_digest
+
+# Output formats for recompressed images: (mimetype, file extension)
+IMAGE_FORMATS = {'JPEG': ('image/jpeg', '.jpg'), 'WEBP': ('image/webp', '.webp')}
+GRAYSCALE_TOLERANCE = 8   # largest channel difference, in levels, for an image to count as grayscale
+EXIF_ORIENTATION = 0x0112   # EXIF tag holding how the camera was turned
+OPTIMIZE_WORKERS = 2
+
+# Optimization jobs keyed by (file hash, options), so reruns and other sessions reuse a running or finished job
+_jobs = ResultCache(ttl=3600, max_bytes=512 * 1024 * 1024)
+_jobs_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=OPTIMIZE_WORKERS, thread_name_prefix='upload-optimize')
+
+
+class OptimizeOptions:
+    """How uploads are optimized: image format and quality, resolution cap, grayscale detection, PDF rewriting."""
+
+    def __init__(self, image_format='JPEG', quality=85, max_dpi=300, grayscale=True, compress_pdf=True,
+                 linearize=False):
+        self.image_format = image_format
+        self.quality = quality
+        self.max_dpi = max_dpi
+        self.grayscale = grayscale
+        self.compress_pdf = compress_pdf
+        self.linearize = linearize
+
+    def key(self):
+        return tuple(sorted(vars(self).items()))
+
+
+class OptimizedFile(io.BytesIO):
+    """An optimized upload, readable by the submission body like Streamlit's UploadedFile."""
+
+    def __init__(self, data, name, type, original_size):
+        super().__init__(data)
+        self.name = name
+        self.type = type
+        self.size = len(data)
+        self.original_size = original_size
+
+    @property
+    def saved_bytes(self):
+        return self.original_size - self.size
+
+
+def is_grayscale(img):
+    """Return True if a color image only holds gray pixels, judged on a small copy."""
+    if img.mode in ('L', 'LA', '1'):
+        return True
+    small = img.convert('RGB')
+    small.thumbnail((256, 256))
+    red, green, blue = small.split()
+    return max(ImageChops.difference(red, green).getextrema()[1],
+               ImageChops.difference(green, blue).getextrema()[1]) <= GRAYSCALE_TOLERANCE
+
+
+def optimize_image(data, name, options):
+    """Recompress an image as JPEG or WebP, downscaled to options.max_dpi; returns (data, name, mimetype)."""
+    img = Image.open(io.BytesIO(data))
+    dpi = img.info.get('dpi')
+    scale = options.max_dpi / dpi[0] if dpi and dpi[0] > options.max_dpi else 1
+    target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if scale < 1:
+        img.draft('RGB', target)  # JPEG decodes straight to a smaller scale
+    if img.getexif().get(EXIF_ORIENTATION, 1) >= 5:
+        target = target[::-1]  # Orientations 5 to 8 turn the image a quarter, swapping its sides
+    img = ImageOps.exif_transpose(img)  # Bake in the orientation, the EXIF tag is not kept
+    if scale < 1:
+        img = img.resize(target, Image.LANCZOS)
+
+    has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+    if has_alpha and options.image_format == 'JPEG':
+        background = Image.new('RGB', img.size, 'white')
+        background.paste(img.convert('RGBA'), mask=img.convert('RGBA').getchannel('A'))
+        img, has_alpha = background, False
+    if options.grayscale and not has_alpha and is_grayscale(img):
+        img = img.convert('L')
+    elif img.mode not in ('RGB', 'L', 'RGBA'):
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    out = io.BytesIO()
+    save_options = {'quality': options.quality}
+    if options.image_format == 'JPEG':
+        save_options.update(optimize=True, progressive=True)
+    else:
+        save_options.update(method=6)
+    if dpi:
+        save_options['dpi'] = (min(dpi[0], options.max_dpi), min(dpi[1], options.max_dpi))
+    img.save(out, options.image_format, **save_options)
+    mimetype, extension = IMAGE_FORMATS[options.image_format]
+    return out.getvalue(), os.path.splitext(name)[0] + extension, mimetype
+
+
+def optimize(data, name, mimetype, options):
+    """Return (data, name, mimetype) of the optimized file, or of the original if optimizing did not shrink it."""
+    if mimetype == 'application/pdf':
+        if not options.compress_pdf:
+            return data, name, mimetype
+        from pdf_render import compress_pdf
+        optimized = compress_pdf(data, options.linearize), name, mimetype
+    elif mimetype.startswith('image/'):
+        optimized = optimize_image(data, name, options)
+    else:
+        return data, name, mimetype
+    return optimized if len(optimized[0]) < len(data) else (data, name, mimetype)
+
+
+def start_optimizing(uploaded_file, options):
+    """Optimize an upload in a background thread, once per file contents and options; returns the Future.
+
+    The Future's result is (data, name, mimetype), as returned by optimize().
+    """
+    data = uploaded_file.getvalue()
+    key = (file_digest(data), options.key())
+    with _jobs_lock:
+        future = _jobs.get(key)
+        if future is None:
+            future = _pool.submit(optimize, data, uploaded_file.name, uploaded_file.type, options)
+            _jobs.set(key, future, size=len(data))
+    return future
+
+
+def optimized_file(future, original_size):
+    """Return a fresh readable file for a finished optimization job."""
+    data, name, mimetype = future.result()
+    return OptimizedFile(data, name, mimetype, original_size)
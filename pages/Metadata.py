@@ -1,126 +1,81 @@
+import time
+script_started = time.perf_counter()
+
 import streamlit as st
 import requests
-import json
-import base64
-from PIL import Image, ImageFilter
-import fitz  # PyMuPDF
-import io
-import re
-
-def safe_load_json(validation_arguments):
-    try:
-        # Replace single quotes with double quotes to make it valid JSON
-        valid_json = validation_arguments.replace("'", '"')
-        # The JSON loads function expects double backslashes for escape sequences.
-        # Replacing single backslashes with double backslashes before JSON parsing to preserve them in regex.
-        valid_json = valid_json.replace("\\", "\\\\")
-        # Load the JSON string
-        data = json.loads(valid_json)
-        # Extract the 'pattern' and replace double backslashes with single backslashes for regex usage
-        pattern = data['pattern']
-        cleaned_pattern = pattern.replace('\\\\', '\\')
-        #st.text(cleaned_pattern)
-        return cleaned_pattern      
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        return ""
-    except KeyError as e:
-        print(f"Missing key in JSON data: {e}")
-        return ""
-    
-def validate_input(input_value, pattern):
-    """Return True if input matches pattern, otherwise False."""
-    if pattern and not re.match(pattern, input_value):
-        return False
-    return True
-
-# Set up error placeholders in the session state when creating inputs
+from dms_cache import file_digest
+from dms_client import FetchError
+from instrumentation import diagnostics_panel, record_phase
+from schema_registry import get_schemas, refresh_schemas
+from upload import BatchItem, run_batch, send_submission, submission_body
 
+# pandas, fitz and PIL are imported on first use, so the page paints before they load
 
+# Approximate width in pixels of the preview column, used to pick the PDF render DPI and image preview size
+PREVIEW_WIDTH_PX = 1400
+ZOOM_LEVELS = [1, 2, 4, 8, 16]
+THUMBNAIL_COLUMNS = 6
 
-def load_image(image_file):
-    """Load an image file."""
-    return Image.open(image_file)
+def get_schema(doc_type_id):
+    """Return the cached schema of a document type."""
+    return get_schemas()[doc_type_id]
 
-def get_document_types():
-    """Retrieve all document types from the API."""
-    url = "https://sagawa.epik.live/api/v4/document_types/"
-    document_types = []
-    next_url = url
-    while next_url:
-        response = requests.get(next_url, auth=('admin', 'JzWnZGWASr2Qnf@cM8jT'))
-        if response.status_code == 200:
-            data = response.json()
-            document_types.extend(data['results'])
-            next_url = data['next']  # Update next_url for the next iteration
-        else:
-            return []  # Return an empty list if there's an error
-    return document_types
-
-def get_metadata_types(doc_type_id):
-    """Retrieve metadata types for a specific document type."""
-    url = f"https://sagawa.epik.live/api/v4/document_types/{doc_type_id}/metadata_types/"
-    response = requests.get(url, auth=('admin', 'JzWnZGWASr2Qnf@cM8jT'))
-    if response.status_code == 200:
-        return response.json()['results']
-    else:
-        return []
-
-def save_to_json(file_base64, file_name, doc_type_id, metadata_values):
-    """Save data to a JSON file with the specified structure."""
-    metadata_list = [{"id": id, "value": value} for id, value in metadata_values.items()]
-    data = {
-        "file_base64": file_base64,
-        "dms_domain": "sagawa.epik.live",
-        "file_name": file_name,
-        "doctype_id": doc_type_id,
-        "docmeta_data": metadata_list
-    }
-    with open('data.json', 'w') as json_file:
-        json.dump(data, json_file)
-
-def save_and_download_json(file_base64, file_name, doc_type_id, metadata_values):
-    """Save and download the generated JSON file."""
+def submit_and_offer_json(uploaded_file, doc_type_id, metadata_values, offer_download=False):
+    """Stream the submission to the API and, only if asked, offer the JSON body for download."""
     progress_text = st.markdown(" ***Please wait a moment for the data submission process.***")
     progress_bar = st.progress(0)
-    save_to_json(file_base64, file_name, doc_type_id, metadata_values)
-    
-    progress_bar.progress(40) 
-    with open('data.json', 'rb') as f:
-        data = f.read()
-    progress_bar.progress(75)
-    st.download_button(label="Download JSON", data=data, file_name="data.json", mime="application/json")
-    json_data = json.loads(data)
-    
+    body = submission_body(uploaded_file, doc_type_id, metadata_values)
+    if offer_download:
+        # Built on demand only; the upload itself never holds the whole JSON in memory
+        st.download_button(label="Download JSON", data=body.to_bytes(), file_name="data.json", mime="application/json")
+    progress_bar.progress(40)
+
     # Sending the data to the API endpoint
-    response = send_data_to_api(json_data)
+    try:
+        response = send_submission(body)
+    except requests.RequestException as e:
+        st.error(f"Failed to send data to the API: {e}")
+        progress_bar.progress(0)
+        return False
     if response.status_code == 200:
         
         progress_bar.progress(100)
         progress_text.markdown(" :green[Data submission completed successfully!]")  # Complete the progress bar only if API call is successful
+        return True
     else:
         st.error(f"Failed to send data to the API: {response.status_code}")
         progress_bar.progress(0)
-def send_data_to_api(json_data):
-    """Send JSON data to a specified API endpoint."""
-    url = "https://dms.api.epik.live/api/processBase64File"
-    headers = {'Content-Type': 'application/json'}
-    response = requests.post(url, json=json_data, headers=headers)
-    return response
+        return False
+
 def main():
     st.set_page_config(layout="wide", page_title="Document Viewer App")
     st.markdown("<style>.reportview-container .main .block-container{max-width: 90%;}</style>", unsafe_allow_html=True)
 
-    document_types = get_document_types()
-    doc_type_options = {doc['label']: doc['id'] for doc in document_types}
-
     col_title1, col_title2 = st.columns([1,8])
     with col_title2:
         st.title('Document Viewer App')
+    record_phase("Document Viewer", 'first_paint', time.perf_counter() - script_started)
+
+    # Document and metadata types are loaded once and shared until the TTL expires or a refresh
+    if st.sidebar.button("Refresh document types"):
+        refresh_schemas()
+    try:
+        schemas = get_schemas()
+    except FetchError as e:
+        st.error(str(e))
+        schemas = {}
+    doc_type_options = {schema.label: schema.id for schema in schemas.values()}
+
+    mode = st.sidebar.radio("Upload mode", ("Single document", "Batch upload"), key='upload_mode')
+    optimize_options = optimization_options() if mode == "Single document" else None
 
     col_empty_1, col_select, col_upload, col_empty_4 = st.columns([1,4,4,1])
     with col_select:
         doc_type = st.selectbox("Choose the document type:", list(doc_type_options.keys()), key='doc_type')
+    if mode == "Batch upload":
+        if doc_type:
+            batch_upload(doc_type_options[doc_type])
+        return
     with col_upload:
         uploaded_file = st.file_uploader("Upload your document", type=['png', 'jpg', 'jpeg', 'pdf'], key="uploaded_file")
 
@@ -138,43 +93,206 @@ def main():
 
     with col3_input_filed:
         if doc_type and uploaded_file:
-            metadata_types = get_metadata_types(doc_type_options[doc_type])
-            metadata_values = {}
-
-            for meta in metadata_types:
-                metadata_info = meta['metadata_type']
-                label = metadata_info['label']
-                required = meta['required']
-                input_key = f"meta_{metadata_info['id']}_{uploaded_file.name}"
-                
-                # Check if there's a lookup list
-                if metadata_info.get('lookup'):
-                    options = metadata_info['lookup'].split(',')
-                    # Use selectbox for lookup values
-                    selected_option = st.selectbox(
-                        f"{label}{' *' if required else ''}", options, key=input_key
-                    )
-                    metadata_values[metadata_info['id']] = selected_option
-                else:
-                    # Regular text input
-                    metadata_values[metadata_info['id']] = st.text_input(
-                        f"{label}{' *' if required else ''}",
-                        key=input_key
-                    )
+            # Optimization starts as soon as the file is uploaded and runs while the form is filled in
+            optimization = optimization_status(uploaded_file, optimize_options) if optimize_options else None
+            schema = get_schema(doc_type_options[doc_type])
+            metadata_values = metadata_inputs(schema.fields, uploaded_file.name)
 
+            offer_download = st.checkbox("Offer the submission JSON for download", key='offer_download')
             if st.button("Done and Submit", type="primary"):
                 # Perform validation and handle submission
-                handle_submission(uploaded_file, doc_type_options[doc_type], metadata_values)
+                handle_submission(uploaded_file, doc_type_options[doc_type], metadata_values, offer_download,
+                                  optimization)
+
+def optimization_options():
+    """Return the sidebar's pre-upload optimization settings, or None when optimization is off."""
+    if not st.sidebar.checkbox("Optimize files before upload", key='optimize_uploads'):
+        return None
+    from optimize import IMAGE_FORMATS, OptimizeOptions
+    from pdf_render import linearize_supported
+
+    with st.sidebar.expander("Optimization settings"):
+        image_format = st.selectbox("Image format", list(IMAGE_FORMATS), key='optimize_format')
+        quality = st.slider("Image quality", 40, 95, 85, key='optimize_quality')
+        max_dpi = st.number_input("Maximum resolution (DPI)", min_value=72, max_value=1200, value=300, step=50,
+                                  key='optimize_dpi')
+        grayscale = st.checkbox("Store gray scans as grayscale", value=True, key='optimize_grayscale')
+        compress_pdf = st.checkbox("Compress PDFs", value=True, key='optimize_pdf')
+        # Offered only where the installed PyMuPDF can still linearize, so the option always has an effect
+        linearize = linearize_supported() and st.checkbox("Linearize PDFs for fast web view", key='optimize_linearize')
+    return OptimizeOptions(image_format, quality, max_dpi, grayscale, compress_pdf, linearize)
+
+def optimization_status(uploaded_file, options):
+    """Start optimizing the upload in the background and show how far it got; returns its job."""
+    from optimize import start_optimizing
+
+    future = start_optimizing(uploaded_file, options)
+    if not future.done():
+        st.caption("Optimizing the file in the background...")
+    elif future.exception() is not None:
+        st.caption(f"The file could not be optimized and will be sent as is: {future.exception()}")
+    else:
+        size = len(future.result()[0])
+        saved = uploaded_file.size - size
+        if saved > 0:
+            st.caption(f"Optimized: {uploaded_file.size / 1e6:.2f} MB to {size / 1e6:.2f} MB, "
+                       f"saving {saved / 1e6:.2f} MB ({saved / uploaded_file.size:.0%}) before base64.")
+        else:
+            st.caption("The file is already compact and will be sent as is.")
+    return future
+
+def batch_status_table(items):
+    """Return one row per batch item for the status table."""
+    return [{'File': item.uploaded_file.name, 'Status': item.status, 'Runs': item.runs,
+             'Seconds': round(item.seconds, 1) if item.seconds is not None else None,
+             'Error': item.error or ''} for item in items]
+
+def run_batch_with_progress(items):
+    """Submit the unfinished batch items, updating the status table and throughput as they finish."""
+    import pandas as pd
+
+    pending_bytes = sum(item.size for item in items if item.status != 'done')
+    progress_bar = st.progress(0)
+    status_table = st.empty()
+    throughput_text = st.empty()
+    started = time.monotonic()
+    sent_bytes = 0
+    finished = 0
+    total = sum(1 for item in items if item.status != 'done')
+    for item in run_batch(items):
+        finished += 1
+        if item.status == 'done':
+            sent_bytes += item.size
+        elapsed = max(time.monotonic() - started, 1e-6)
+        progress_bar.progress(finished / total)
+        status_table.dataframe(pd.DataFrame(batch_status_table(items)), hide_index=True)
+        throughput_text.caption(f"{finished}/{total} files, {sent_bytes / 1e6:.1f} of {pending_bytes / 1e6:.1f} MB sent, "
+                                f"{sent_bytes / 1e6 / elapsed:.2f} MB/s, {finished * 60 / elapsed:.1f} files/min")
+
+def sheet_metadata(sheet, schema):
+    """Validate a bulk metadata sheet, show its error report and return {file name: metadata values} for valid rows."""
+    from bulk_import import file_column, metadata_columns, read_sheet, row_metadata, validate_sheet
+
+    # Validation runs once per sheet contents and document type, not on every rerun
+    cache_key = (file_digest(sheet.getvalue()), schema.id)
+    if st.session_state.get('sheet_key') != cache_key:
+        try:
+            df_sheet = read_sheet(sheet)
+            valid_rows, report = validate_sheet(df_sheet, schema)
+        except (ValueError, ImportError) as e:
+            # ImportError: the Excel reader for this file format is not installed
+            st.error(str(e))
+            return {}
+        columns = metadata_columns(df_sheet, schema)
+        names_column = file_column(df_sheet)
+        st.session_state['sheet_key'] = cache_key
+        st.session_state['sheet_result'] = (
+            len(df_sheet), report,
+            {row[names_column].strip(): row_metadata(row, schema, columns) for row in valid_rows.to_dict('records')},
+        )
+    total_rows, report, values = st.session_state['sheet_result']
+
+    col_rows, col_valid, col_invalid = st.columns(3)
+    col_rows.metric("Rows", total_rows)
+    col_valid.metric("Valid rows", len(values))
+    col_invalid.metric("Rows with errors", report['Row'].nunique())
+    if not report.empty:
+        st.dataframe(report, hide_index=True)
+        st.download_button("Download error report", report.to_csv(index=False), file_name="metadata_errors.csv",
+                           mime="text/csv")
+    return values
+
+def batch_upload(doc_type_id):
+    """Queue many files with shared, per-file or sheet metadata and submit them concurrently."""
+    import pandas as pd
+
+    schema = get_schema(doc_type_id)
+    sheet = st.file_uploader("Metadata sheet (CSV or Excel, optional)", type=['csv', 'xlsx', 'xls'], key="batch_sheet")
+    sheet_values = sheet_metadata(sheet, schema) if sheet else None
+
+    uploaded_files = st.file_uploader("Upload your documents", type=['png', 'jpg', 'jpeg', 'pdf'],
+                                      accept_multiple_files=True, key="batch_files")
+    if not uploaded_files:
+        return
+
+    if sheet_values is None:
+        st.markdown("##### Shared metadata")
+        shared_values = metadata_inputs(schema.fields, 'batch')
+
+        # One editable row per file, prefilled with the shared values
+        st.markdown("##### Per-file metadata")
+        columns = {str(field.id): field.label for field in schema.fields}
+        df_rows = pd.DataFrame([{'File': f.name, **{str(id): value for id, value in shared_values.items()}}
+                                for f in uploaded_files])
+        edited_rows = st.data_editor(
+            df_rows, disabled=['File'], hide_index=True, key='batch_metadata',
+            column_config={id: st.column_config.TextColumn(label) for id, label in columns.items()},
+        )
+    else:
+        unmatched = [f.name for f in uploaded_files if f.name not in sheet_values]
+        st.caption(f"{len(uploaded_files) - len(unmatched)} of {len(uploaded_files)} files have a valid sheet row.")
+        if unmatched:
+            st.warning("Files without a valid sheet row are skipped: " + ", ".join(unmatched[:20])
+                       + (" ..." if len(unmatched) > 20 else ""))
+
+    # Queued items survive reruns, so a resumed batch skips the files already submitted; only items of
+    # the files still in the uploader, queued under this document type, belong to the batch
+    items = st.session_state.setdefault('batch_items', {})
+    current_keys = {uploaded_file.name + str(uploaded_file.size) for uploaded_file in uploaded_files}
+
+    def current_items():
+        return [item for key, item in items.items() if key in current_keys and item.doc_type_id == doc_type_id]
+
+    col_submit, col_retry = st.columns([1, 1])
+    with col_submit:
+        submit = st.button("Submit batch", type="primary")
+    with col_retry:
+        retry = st.button("Retry failed files", disabled=not any(i.status == 'failed' for i in current_items()))
+
+    if submit:
+        # Forget items of removed files or another document type, and the uploads they hold
+        for key in [key for key, item in items.items() if key not in current_keys or item.doc_type_id != doc_type_id]:
+            del items[key]
+        if sheet_values is None:
+            file_values = [(uploaded_file, {field.id: '' if pd.isna(row[str(field.id)]) else str(row[str(field.id)])
+                                            for field in schema.fields})
+                           for uploaded_file, row in zip(uploaded_files, edited_rows.to_dict('records'))]
+        else:
+            # Only rows that passed the bulk validation are matched to files
+            file_values = [(f, sheet_values[f.name]) for f in uploaded_files if f.name in sheet_values]
+        errors = []
+        for uploaded_file, metadata_values in file_values:
+            file_errors = schema.errors(metadata_values)
+            if file_errors:
+                errors.extend(f"{uploaded_file.name}: {msg}" for msg in file_errors)
+                continue
+            key = uploaded_file.name + str(uploaded_file.size)
+            if key not in items or items[key].status != 'done':
+                items[key] = BatchItem(key, uploaded_file, doc_type_id, metadata_values)
+        for msg in errors:
+            st.error(msg)
+    if submit or retry:
+        run_batch_with_progress(current_items())
+    elif current_items():
+        st.dataframe(pd.DataFrame(batch_status_table(current_items())), hide_index=True)
 
 def display_pdf(uploaded_file):
+    from pdf_render import dpi_for_width, page_info, prefetch_pages, render_page
+
     try:
-        doc = fitz.open(stream=uploaded_file.getvalue(), filetype="pdf")
-        total_pages = len(doc)
-        current_page = st.session_state.get('current_page', 0)
+        data = uploaded_file.getvalue()
+        digest = file_digest(data)
+        total_pages, page_width = page_info(data, digest)
+        current_page = min(st.session_state.get('current_page', 0), total_pages - 1)
 
         col_empty_PDF, col1_titlePDF, col2, col3 = st.columns([1,5,2,2])
         with col1_titlePDF:
             st.markdown("#### Preview of the PDF:")
+            view_mode = st.radio("PDF view", ["Single page", "All pages"], horizontal=True,
+                                 key='pdf_view_mode', label_visibility='collapsed')
+        if view_mode == "All pages":
+            display_pdf_thumbnails(data, digest, total_pages)
+            return
 
         # Navigation buttons
         with col2:
@@ -189,57 +307,111 @@ def display_pdf(uploaded_file):
                     current_page += 1
                     st.session_state['current_page'] = current_page
 
-        # Display current page
-        page = doc.load_page(current_page)
-        pix = page.get_pixmap(dpi=300)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        img = img.filter(ImageFilter.SHARPEN)
+        # Display current page, rendered at the preview width and cached per file, page and DPI
+        dpi = dpi_for_width(page_width, PREVIEW_WIDTH_PX)
+        img = render_page(data, digest, current_page, dpi)
         st.image(img, caption=f"Page {current_page + 1} of {total_pages}", use_column_width=True)
+        # Render the neighbouring pages in the background so paging is instant
+        prefetch_pages(data, digest, current_page, total_pages, dpi)
     except Exception as e:
         st.error(f"Error in PDF processing: {e}")
 
 
 
+def open_pdf_page(page_number):
+    st.session_state['current_page'] = page_number
+    st.session_state['pdf_view_mode'] = "Single page"
+
+def display_pdf_thumbnails(data, digest, total_pages):
+    """Show every page as a thumbnail, filling the grid in as the worker processes finish them."""
+    from pdf_render import thumbnails
+
+    slots = []
+    for row_start in range(0, total_pages, THUMBNAIL_COLUMNS):
+        row_pages = range(row_start, min(row_start + THUMBNAIL_COLUMNS, total_pages))
+        for column, page_number in zip(st.columns(THUMBNAIL_COLUMNS), row_pages):
+            with column:
+                slots.append(st.empty())
+                st.button(f"Page {page_number + 1}", key=f'thumbnail_{page_number}',
+                          on_click=open_pdf_page, args=(page_number,))
+    for page_number, img in thumbnails(data, digest, total_pages):
+        slots[page_number].image(img, use_column_width=True)
+
 def display_image(uploaded_file):
-    image = load_image(uploaded_file)
-    image = image.filter(ImageFilter.SHARPEN)
-    st.image(image, caption='Uploaded Image', use_column_width=True)
-
-def handle_submission(uploaded_file, doc_type_id, metadata_values):
-    # Assuming 'get_metadata_types' returns the full metadata configuration for the document type
-    metadata_types = get_metadata_types(doc_type_id)
-    valid = True
-    error_messages = []
-
-    for meta_id, value in metadata_values.items():
-        meta_info = next((m for m in metadata_types if m['metadata_type']['id'] == meta_id), None)
-        if not meta_info:
-            continue  # Skip if metadata is not found
-
-        # Extract validation and requirement info
-        is_required = meta_info['required']
-        validation_info = meta_info['metadata_type'].get('validation_arguments', '')
-        pattern = safe_load_json(validation_info) if validation_info else ""
-
-        # Check for required fields and validate pattern if necessary
-        if is_required and not value.strip():
-            error_messages.append(f"Field '{meta_info['metadata_type']['label']}' is required.")
-            valid = False
-        elif pattern and not validate_input(value, pattern):
-            error_messages.append(f"Validation failed for {meta_info['metadata_type']['label']}: {value}")
-            valid = False
+    from image_render import image_info, preview, render_region
+
+    try:
+        data = uploaded_file.getvalue()
+        digest = file_digest(data)
+        width, height = image_info(data, digest)
+        zoom = st.select_slider("Zoom", options=ZOOM_LEVELS, format_func=lambda z: f"{z}x", key='image_zoom')
+        if zoom == 1:
+            # Decoded once at display size and sharpened there; cached per file and width
+            img = preview(data, digest, PREVIEW_WIDTH_PX)
+            st.image(img, caption=f'Uploaded Image ({width} x {height})', use_column_width=True)
+            return
+
+        # Pan over the full-size image; only the visible region is assembled from cached tiles
+        col_x, col_y = st.columns(2)
+        with col_x:
+            center_x = st.slider("Horizontal position", 0, 100, 50, key='image_x') / 100
+        with col_y:
+            center_y = st.slider("Vertical position", 0, 100, 50, key='image_y') / 100
+        region_width, region_height = max(1, width // zoom), max(1, height // zoom)
+        left = min(max(0, int(center_x * width - region_width / 2)), width - region_width)
+        top = min(max(0, int(center_y * height - region_height / 2)), height - region_height)
+        box = (left, top, left + region_width, top + region_height)
+        img = render_region(data, digest, box, PREVIEW_WIDTH_PX)
+        st.image(img, caption=f'Uploaded Image, {zoom}x zoom', use_column_width=True)
+    except Exception as e:
+        st.error(f"Error in image processing: {e}")
+
+def metadata_inputs(fields, key_suffix):
+    """Render one input per metadata field and return {metadata type id: value}."""
+    metadata_values = {}
+    for field in fields:
+        input_key = f"meta_{field.id}_{key_suffix}"
+        
+        # Check if there's a lookup list
+        if field.options:
+            # Use selectbox for lookup values
+            selected_option = st.selectbox(
+                f"{field.label}{' *' if field.required else ''}", field.options, key=input_key
+            )
+            metadata_values[field.id] = selected_option
+        else:
+            # Regular text input
+            metadata_values[field.id] = st.text_input(
+                f"{field.label}{' *' if field.required else ''}",
+                key=input_key
+            )
+        if field.pattern_error:
+            st.warning(field.pattern_error)
+    return metadata_values
+
+def handle_submission(uploaded_file, doc_type_id, metadata_values, offer_download=False, optimization=None):
+    # Validators are precompiled in the cached schema, so this costs no API calls or regex parsing
+    error_messages = get_schema(doc_type_id).errors(metadata_values)
 
     # Display all error messages if any
     if error_messages:
         for msg in error_messages:
             st.error(msg)
-    
-    if valid:
-        file_base64 = base64.b64encode(uploaded_file.getvalue()).decode('utf-8')
-        file_name = uploaded_file.name
-        save_and_download_json(file_base64, file_name, doc_type_id, metadata_values)
-        st.success("Data saved and submitted successfully!")
+    else:
+        if optimization is not None:
+            from optimize import optimized_file
+
+            with st.spinner("Finishing the optimization..."):
+                try:
+                    uploaded_file = optimized_file(optimization, uploaded_file.size)
+                except Exception as e:
+                    st.warning(f"Sending the original file, optimization failed: {e}")
+        if submit_and_offer_json(uploaded_file, doc_type_id, metadata_values, offer_download):
+            saved = getattr(uploaded_file, 'saved_bytes', 0)
+            st.success("Data saved and submitted successfully!"
+                       + (f" Optimization saved {saved / 1e6:.2f} MB." if saved > 0 else ""))
 
 
 if __name__ == "__main__":
     main()
+    diagnostics_panel()
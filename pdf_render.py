@@ -0,0 +1,205 @@
+import contextlib
+import functools
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageFilter
+
+from dms_cache import ResultCache
+
+MIN_DPI = 72
+MAX_DPI = 300
+DPI_STEP = 25           # DPIs are rounded to this step so nearby widths share cache entries
+PREFETCH_PAGES = 1      # pages rendered ahead and behind the current one
+THUMBNAIL_WIDTH_PX = 160
+THUMBNAIL_CHUNK = 4     # pages per worker task, small enough for the grid to fill in progressively
+PROCESS_WORKERS = os.cpu_count() or 2   # processes rendering thumbnails and compressing PDFs
+
+# Rendered pages keyed by (file hash, page, dpi), bounded by pixel memory
+page_cache = ResultCache(ttl=3600, max_bytes=256 * 1024 * 1024)
+
+# PyMuPDF is not thread-safe, so every fitz call goes through this lock
+_fitz_lock = threading.Lock()
+_prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-prefetch')
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def page_info(data, digest):
+    """Return (page count, width of the first page in points) for a PDF, cached per file."""
+    def load():
+        with _fitz_lock:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                return len(doc), doc[0].rect.width if len(doc) else 0
+    return page_cache.get_or_load(('info', digest), load)
+
+
+def dpi_for_width(page_width_pt, display_width_px):
+    """Return the DPI that renders a page at the displayed width, clamped and rounded to DPI_STEP."""
+    if not page_width_pt:
+        return MAX_DPI
+    dpi = display_width_px * 72 / page_width_pt
+    dpi = round(dpi / DPI_STEP) * DPI_STEP
+    return int(min(MAX_DPI, max(MIN_DPI, dpi)))
+
+
+def _render(data, page_number, dpi):
+    with _fitz_lock:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            pix = doc.load_page(page_number).get_pixmap(dpi=dpi)
+            # Build the image from the raw samples instead of a PNG encode/decode round trip
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    return img.filter(ImageFilter.SHARPEN)
+
+
+def render_page(data, digest, page_number, dpi):
+    """Return the sharpened page image, rendering it only on a cache miss."""
+    key = (digest, page_number, dpi)
+    img = page_cache.get(key)
+    if img is None:
+        img = _render(data, page_number, dpi)
+        page_cache.set(key, img, size=img.width * img.height * 3)
+    return img
+
+
+# MuPDF's own errors, raised e.g. by builds that no longer support linearization
+_MUPDF_ERROR = getattr(getattr(fitz, 'mupdf', None), 'FzErrorBase', RuntimeError)
+
+
+@functools.lru_cache(maxsize=None)
+def linearize_supported():
+    """Return True if the installed MuPDF can still write linearized PDFs; probed once on a blank page."""
+    with _fitz_lock:
+        with fitz.open() as doc:
+            doc.new_page()
+            try:
+                doc.tobytes(linear=True)
+            except (_MUPDF_ERROR, RuntimeError, ValueError):
+                return False  # Recent MuPDF builds dropped linearization
+    return True
+
+
+def _compress_pdf_file(path, linearize):
+    # Runs in a worker process, which opens the document itself; returns the rewritten PDF
+    with fitz.open(path) as doc:
+        return doc.tobytes(garbage=4, clean=True, deflate=True, deflate_images=True, deflate_fonts=True,
+                           linear=linearize)
+
+
+def compress_pdf(data, linearize=False):
+    """Rewrite a PDF without unused objects and with its streams, images and fonts deflated.
+
+    linearize is ignored where linearize_supported() is False. The rewrite runs in the process pool, so it never holds the fitz lock
+    that page rendering in the Document Viewer waits on.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as handle:
+        handle.write(data)
+    try:
+        return _get_process_pool().submit(_compress_pdf_file, handle.name,
+                                          linearize and linearize_supported()).result()
+    except BrokenProcessPool:
+        _reset_process_pool()  # A worker died; start a fresh pool next time
+        raise
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(handle.name)
+
+
+def _prefetch_one(data, digest, page_number, dpi):
+    key = (digest, page_number, dpi)
+    try:
+        render_page(data, digest, page_number, dpi)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(key)
+
+
+def prefetch_pages(data, digest, page_number, total_pages, dpi):
+    """Render the pages around page_number in the background so paging to them is instant."""
+    for offset in range(1, PREFETCH_PAGES + 1):
+        for neighbour in (page_number + offset, page_number - offset):
+            if not 0 <= neighbour < total_pages:
+                continue
+            key = (digest, neighbour, dpi)
+            with _in_flight_lock:
+                if key in _in_flight or page_cache.get(key) is not None:
+                    continue
+                _in_flight.add(key)
+            _prefetch_pool.submit(_prefetch_one, data, digest, neighbour, dpi)
+
+
+def _get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned rather than forked, so workers never inherit a held lock from the app's threads;
+            # each worker has its own fitz, so its work never waits on _fitz_lock
+            _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        _process_pool = None
+
+
+def _render_thumbnail_chunk(path, page_numbers, width_px):
+    # Runs in a worker process, which opens the document itself; returns raw RGB samples
+    thumbnails = []
+    with fitz.open(path) as doc:
+        for page_number in page_numbers:
+            page = doc.load_page(page_number)
+            zoom = width_px / page.rect.width if page.rect.width else 1
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            thumbnails.append((page_number, pix.width, pix.height, pix.samples))
+    return thumbnails
+
+
+def thumbnails(data, digest, total_pages, width_px=THUMBNAIL_WIDTH_PX):
+    """Yield (page number, thumbnail) for every page of a PDF as soon as each is available.
+
+    Cached thumbnails come first. The rest are rendered in parallel by a
+    process pool, in chunks of THUMBNAIL_CHUNK pages. Each worker opens the
+    document from a temporary file, so the PDF is not pickled per task.
+    Thumbnails are cached by file hash as they complete.
+    """
+    missing = []
+    for page_number in range(total_pages):
+        img = page_cache.get((digest, 'thumbnail', page_number, width_px))
+        if img is None:
+            missing.append(page_number)
+        else:
+            yield page_number, img
+    if not missing:
+        return
+
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as handle:
+        handle.write(data)
+    futures = []
+    try:
+        pool = _get_process_pool()
+        futures = [pool.submit(_render_thumbnail_chunk, handle.name, missing[i:i + THUMBNAIL_CHUNK], width_px)
+                   for i in range(0, len(missing), THUMBNAIL_CHUNK)]
+        for future in as_completed(futures):
+            for page_number, width, height, samples in future.result():
+                img = Image.frombytes("RGB", (width, height), samples)
+                page_cache.set((digest, 'thumbnail', page_number, width_px), img, size=width * height * 3)
+                yield page_number, img
+    except BrokenProcessPool:
+        _reset_process_pool()  # A worker died; start a fresh pool next time
+        raise
+    finally:
+        # Also runs when a rerun abandons the grid: drop the queued chunks
+        for future in futures:
+            future.cancel()
+        with contextlib.suppress(OSError):
+            os.unlink(handle.name)
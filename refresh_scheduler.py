@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+REFRESH_WORKERS = 2   # datasets loaded at the same time
+RETRY_AFTER = 60      # seconds before a failed load is retried
+IDLE_AFTER = 3600     # stop refreshing a dataset nobody has read for this many seconds
+POLL_SECONDS = 1
+
+
+class Snapshot:
+    """The latest loaded value of a dataset, when it was loaded and the last load error."""
+
+    def __init__(self, value, loaded_at, error=None):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.error = error
+
+    @property
+    def age(self):
+        return time.time() - self.loaded_at
+
+
+class _Dataset:
+    def __init__(self, name, loader, interval):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.snapshot = None
+        self.future = None      # the in-flight load, shared by everyone asking for it
+        self.attempted_at = 0.0
+        self.read_at = time.time()
+
+    def due(self, now):
+        if self.snapshot is None or self.future is not None or now - self.read_at > IDLE_AFTER:
+            return False
+        interval = RETRY_AFTER if self.snapshot.error is not None else self.interval
+        return now - self.attempted_at >= interval
+
+
+class RefreshScheduler:
+    """Process-wide background refresher of named datasets.
+
+    Each registered dataset is reloaded on its own interval by a background
+    thread, for as long as some session keeps reading it. Readers get the
+    latest snapshot at once; only the very first read of a dataset waits
+    for a load. Concurrent loads of one dataset are coalesced into a single
+    in-flight call of its loader (single-flight). A failed load keeps the
+    previous value and records the error on the snapshot.
+    """
+
+    def __init__(self, workers=REFRESH_WORKERS):
+        self._datasets = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dms-refresh')
+        self._thread = None
+
+    def register(self, name, loader, interval):
+        """Add a dataset, or update the loader and interval of a registered one."""
+        with self._lock:
+            dataset = self._datasets.get(name)
+            if dataset is None:
+                self._datasets[name] = _Dataset(name, loader, interval)
+            else:
+                dataset.loader, dataset.interval = loader, interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='dms-refresh-scheduler', daemon=True)
+                self._thread.start()
+
+    def get(self, name):
+        """Return the latest snapshot of a dataset, waiting only if it has never been loaded."""
+        with self._lock:
+            dataset = self._datasets[name]
+            dataset.read_at = time.time()
+            future = self._trigger(dataset) if dataset.snapshot is None else None
+        if future is not None:
+            future.result()
+        return dataset.snapshot
+
+    def age(self, name):
+        """Return the age in seconds of a dataset's snapshot, or None if it is not loaded."""
+        dataset = self._datasets.get(name)
+        snapshot = dataset.snapshot if dataset is not None else None
+        return None if snapshot is None else snapshot.age
+
+    def is_refreshing(self, name):
+        dataset = self._datasets.get(name)
+        return dataset is not None and dataset.future is not None
+
+    def refresh(self, name=None):
+        """Start loading one dataset, or all of them, now; returns without waiting."""
+        with self._lock:
+            for dataset in self._datasets.values():
+                if name is None or dataset.name == name:
+                    self._trigger(dataset)
+
+    def wait(self, name):
+        """Wait for the in-flight load of a dataset, if there is one."""
+        dataset = self._datasets.get(name)
+        future = dataset.future if dataset is not None else None
+        if future is not None:
+            future.result()
+
+    def clear(self):
+        """Wait for in-flight loads, then drop every snapshot."""
+        with self._lock:
+            futures = [dataset.future for dataset in self._datasets.values() if dataset.future is not None]
+        wait(futures)
+        with self._lock:
+            for dataset in self._datasets.values():
+                dataset.snapshot = None
+                dataset.attempted_at = 0.0
+
+    def _trigger(self, dataset):
+        # Callers hold the lock; a dataset never has more than one load in flight
+        if dataset.future is None:
+            dataset.attempted_at = time.time()
+            dataset.future = self._pool.submit(self._load, dataset)
+        return dataset.future
+
+    def _load(self, dataset):
+        started = time.time()
+        try:
+            snapshot = Snapshot(dataset.loader(), started)
+        except Exception as e:  # Keep serving the previous value; readers see the error
+            previous = dataset.snapshot
+            snapshot = Snapshot(previous.value if previous else None,
+                                previous.loaded_at if previous else started, error=e)
+        with self._lock:
+            dataset.snapshot = snapshot
+            dataset.future = None
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                for dataset in self._datasets.values():
+                    if dataset.due(now):
+                        self._trigger(dataset)
+            time.sleep(POLL_SECONDS)
+
+
+# Process-wide scheduler shared by every session and rerun
+scheduler = RefreshScheduler()
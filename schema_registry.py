@@ -0,0 +1,108 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from dms_cache import ResultCache
+from dms_client import API_ROOT, MAX_WORKERS, fetch_all
+
+SCHEMA_TTL = 3600  # seconds before document and metadata types are reloaded
+
+# Document type schemas, shared by every session of the Document Viewer
+schema_cache = ResultCache(ttl=SCHEMA_TTL)
+
+
+def load_validation_pattern(validation_arguments):
+    """Return the regex pattern from a metadata type's validation arguments.
+
+    Raises ValueError when the arguments are not JSON or have no pattern.
+    """
+    try:
+        # Replace single quotes with double quotes to make it valid JSON
+        valid_json = validation_arguments.replace("'", '"')
+        # The JSON loads function expects double backslashes for escape sequences.
+        # Replacing single backslashes with double backslashes before JSON parsing to preserve them in regex.
+        valid_json = valid_json.replace("\\", "\\\\")
+        # Load the JSON string
+        data = json.loads(valid_json)
+        # Extract the 'pattern' and replace double backslashes with single backslashes for regex usage
+        pattern = data['pattern']
+        cleaned_pattern = pattern.replace('\\\\', '\\')
+        return cleaned_pattern
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Error decoding JSON: {e}") from e
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Missing key in JSON data: {e}") from e
+
+
+class FieldValidator:
+    """A document type's metadata field with its validation rules prepared once."""
+
+    def __init__(self, meta):
+        metadata_info = meta['metadata_type']
+        self.id = metadata_info['id']
+        self.label = metadata_info['label']
+        self.required = meta['required']
+        validation_info = metadata_info.get('validation_arguments') or ''
+        self.pattern = ""
+        self.regex = None
+        self.pattern_error = None  # Shown next to the field; a pattern that cannot be read or compiled is not checked
+        if validation_info:
+            try:
+                self.pattern = load_validation_pattern(validation_info)
+                self.regex = re.compile(self.pattern) if self.pattern else None
+            except (ValueError, re.error) as e:
+                self.pattern_error = f"Invalid validation pattern for {self.label}, values are not checked: {e}"
+        lookup = metadata_info.get('lookup')
+        self.options = lookup.split(',') if lookup else []
+        self.option_set = frozenset(self.options)
+
+    def error(self, value):
+        """Return the error message for value, or None if it is valid."""
+        if self.required and not value.strip():
+            return f"Field '{self.label}' is required."
+        if self.regex is not None and not self.regex.match(value):
+            return f"Validation failed for {self.label}: {value}"
+        if self.option_set and value and value not in self.option_set:
+            return f"Value for {self.label} is not one of its lookup options: {value}"
+        return None
+
+
+class DocumentTypeSchema:
+    """A document type and its metadata fields, in API order and indexed by id."""
+
+    def __init__(self, document_type, metadata_types):
+        self.id = document_type['id']
+        self.label = document_type['label']
+        self.fields = [FieldValidator(meta) for meta in metadata_types]
+        self.fields_by_id = {field.id: field for field in self.fields}
+
+    def errors(self, metadata_values):
+        """Return the validation error messages for {metadata type id: value}."""
+        error_messages = []
+        for meta_id, value in metadata_values.items():
+            field = self.fields_by_id.get(meta_id)
+            if field is None:
+                continue  # Skip if metadata is not found
+            message = field.error(value)
+            if message:
+                error_messages.append(message)
+        return error_messages
+
+
+def load_schemas():
+    """Fetch every document type and its metadata types, returning {document type id: schema}."""
+    document_types = fetch_all(API_ROOT + "document_types/")
+    urls = [f"{API_ROOT}document_types/{doc['id']}/metadata_types/" for doc in document_types]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        metadata_types = list(pool.map(lambda url: fetch_all(url, max_workers=1), urls))
+    return {doc['id']: DocumentTypeSchema(doc, metas) for doc, metas in zip(document_types, metadata_types)}
+
+
+def get_schemas():
+    """Return the cached document type schemas, loading them when missing or expired."""
+    return schema_cache.get_or_load('schemas', load_schemas)
+
+
+def refresh_schemas():
+    """Drop the cached schemas so the next lookup reloads them from the API."""
+    schema_cache.invalidate()
@@ -0,0 +1,25 @@
+from dms_client import fetch_counts
+from document_store import tag_cooccurrence, tag_counts
+
+
+def build_tag_index(tags):
+    """Return tag document counts, and co-occurrence when available, for the given tags.
+
+    Counts come from one pass over the tag links of the synced documents.
+    When the local store holds no tag links (the API did not embed tags in
+    the document records), they fall back to concurrent count-only requests
+    against each tag's ``documents_url`` and co-occurrence is left empty.
+    """
+    synced_counts = tag_counts()
+    if synced_counts:
+        return {
+            'counts': {tag['id']: synced_counts.get(tag['id'], 0) for tag in tags},
+            'cooccurrence': tag_cooccurrence(),
+            'source': 'documents',
+        }
+    counts = fetch_counts([tag['documents_url'] for tag in tags])
+    return {
+        'counts': {tag['id']: count for tag, count in zip(tags, counts)},
+        'cooccurrence': [],
+        'source': 'counts',
+    }
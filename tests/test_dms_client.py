@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+import dms_client
+
+ENDPOINT = 'http://dms/api/v4/documents/'
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode() if body is not None else b''
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """A session answering GETs from a handler, recording every URL and the headers sent with it."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self.lock:
+            self.calls.append((url, headers))
+        return self.handler(url, headers)
+
+
+def paged(items, default_page_size=3, next_links=True):
+    """Return a handler serving items as DRF page-number pages."""
+    def handler(url, headers):
+        query = dict(parse_qsl(urlsplit(url).query))
+        page, page_size = int(query.get('page', 1)), int(query.get('page_size', default_page_size))
+        results = items[(page - 1) * page_size:page * page_size]
+        more = page * page_size < len(items)
+        next_url = dms_client.with_params(url, page=page + 1) if more and next_links else None
+        # Later pages answer first, so out-of-order completion would show up in the results
+        time.sleep(0.01 * max(0, 5 - page))
+        return FakeResponse(200, {'count': len(items), 'next': next_url, 'results': results})
+    return handler
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(dms_client, 'BACKOFF_FACTOR', 0)
+    dms_client.clear_page_cache()
+
+    def install(handler):
+        fake = FakeSession(handler)
+        monkeypatch.setattr(dms_client, '_session', fake)
+        return fake
+    yield install
+    dms_client.clear_page_cache()
+
+
+def page_numbers(calls):
+    return sorted(int(dict(parse_qsl(urlsplit(url).query)).get('page', 1)) for url, _ in calls)
+
+
+def test_fetch_all_derives_page_urls_from_count(session):
+    fake = session(paged(list(range(10))))
+    assert dms_client.fetch_all(ENDPOINT) == list(range(10))
+    assert page_numbers(fake.calls) == [1, 2, 3, 4]
+    assert all(dict(parse_qsl(urlsplit(url).query)).get('page_size') is None for url, _ in fake.calls)
+
+
+def test_fetch_all_keeps_page_order_under_concurrency(session):
+    fake = session(paged(list(range(40)), default_page_size=4))
+    assert dms_client.fetch_all(ENDPOINT, max_workers=8, page_size=4) == list(range(40))
+    assert page_numbers(fake.calls) == list(range(1, 11))
+
+
+def test_fetch_all_follows_next_links_without_count(session):
+    items = list(range(7))
+
+    def handler(url, headers):
+        offset = int(dict(parse_qsl(urlsplit(url).query)).get('offset', 0))
+        next_url = dms_client.with_params(ENDPOINT, offset=offset + 3) if offset + 3 < len(items) else None
+        return FakeResponse(200, {'next': next_url, 'results': items[offset:offset + 3]})
+
+    fake = session(handler)
+    assert dms_client.fetch_all(ENDPOINT) == items
+    assert len(fake.calls) == 3
+
+
+def test_fetch_count_requests_one_item(session):
+    fake = session(paged(list(range(10))))
+    assert dms_client.fetch_counts([ENDPOINT, ENDPOINT]) == [10, 10]
+    assert all(dict(parse_qsl(urlsplit(url).query))['page_size'] == '1' for url, _ in fake.calls)
+
+
+def test_get_json_retries_transient_statuses(session):
+    responses = [FakeResponse(503), FakeResponse(502), FakeResponse(200, {'results': []})]
+    fake = session(lambda url, headers: responses.pop(0))
+    assert dms_client.get_json(ENDPOINT) == {'results': []}
+    assert len(fake.calls) == 3
+
+
+def test_get_json_raises_after_the_last_retry(session):
+    fake = session(lambda url, headers: FakeResponse(500))
+    with pytest.raises(dms_client.FetchError) as error:
+        dms_client.get_json(ENDPOINT)
+    assert error.value.status == 500
+    assert len(fake.calls) == dms_client.MAX_RETRIES + 1
+
+
+def test_get_json_does_not_retry_client_errors(session):
+    fake = session(lambda url, headers: FakeResponse(404))
+    with pytest.raises(dms_client.FetchError) as error:
+        dms_client.get_json(ENDPOINT)
+    assert error.value.status == 404
+    assert len(fake.calls) == 1
+
+
+def test_get_json_retries_connection_errors(session):
+    attempts = []
+
+    def handler(url, headers):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise dms_client.requests.ConnectionError('reset')
+        return FakeResponse(200, {'results': [1]})
+
+    session(handler)
+    assert dms_client.get_json(ENDPOINT) == {'results': [1]}
+    assert len(attempts) == 2
+
+
+def test_not_modified_page_reuses_the_cached_body(session):
+    body = {'count': 1, 'next': None, 'results': [{'id': 1}]}
+
+    def handler(url, headers):
+        if headers and headers.get('If-None-Match') == 'W/"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, body, {'ETag': 'W/"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+
+    fake = session(handler)
+    assert dms_client.get_json(ENDPOINT) == body
+    assert dms_client.get_json(ENDPOINT) == body
+    assert fake.calls[0][1] is None
+    assert fake.calls[1][1] == {'If-None-Match': 'W/"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+
+def test_not_modified_without_a_cached_body_is_an_error(session):
+    session(lambda url, headers: FakeResponse(304))
+    with pytest.raises(dms_client.FetchError):
+        dms_client.get_json(ENDPOINT)
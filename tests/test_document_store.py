@@ -0,0 +1,170 @@
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import document_store
+
+
+def document(id, created, document_type='Invoice', mimetype='application/pdf', label=None, tags=()):
+    return {
+        'id': id,
+        'label': label or f'doc-{id}',
+        'document_type': {'label': document_type},
+        'file_latest': {'mimetype': mimetype},
+        'datetime_created': created,
+        'tags': [{'id': tag} for tag in tags],
+    }
+
+
+class FakeAPI:
+    """The documents endpoint, answering every page request with the whole collection newest first."""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self.full_fetches = 0
+
+    def get_json(self, url):
+        results = sorted(self.documents, key=lambda d: document_store.to_utc(d['datetime_created']), reverse=True)
+        return {'count': len(self.documents), 'next': None, 'results': results}
+
+    def fetch_all(self, url, page_size=None):
+        assert page_size == document_store.SYNC_PAGE_SIZE
+        self.full_fetches += 1
+        return list(self.documents)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeAPI([
+        document(1, '2024-01-01T10:00:00Z', tags=[1]),
+        document(2, '2024-01-01T11:00:00Z', document_type='Receipt', mimetype='image/png', tags=[1, 2]),
+        document(3, '2024-01-02T09:00:00Z'),
+    ])
+    monkeypatch.setattr(document_store, 'get_json', api.get_json)
+    monkeypatch.setattr(document_store, 'fetch_all', api.fetch_all)
+    return api
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'store.sqlite3')
+
+
+def sync(api, path, **kwargs):
+    return document_store.sync_documents('http://dms/api/v4/documents/', path=path, **kwargs)
+
+
+def test_first_sync_is_full(api, path):
+    assert sync(api, path) == 3
+    assert api.full_fetches == 1
+    assert document_store.document_count(path=path) == 3
+    assert document_store.daily_counts('document_type', path=path) == [
+        ('2024-01-01', 'Invoice', 1), ('2024-01-01', 'Receipt', 1), ('2024-01-02', 'Invoice', 1)]
+    assert document_store.dimension_totals('file_extension', path=path) == {'PDF': 2, 'PNG': 1}
+    assert document_store.tag_counts(path=path) == {1: 2, 2: 1}
+    assert document_store.tag_cooccurrence(path=path) == [(1, 2, 1)]
+
+
+def test_incremental_sync_pulls_only_new_documents(api, path):
+    sync(api, path)
+    api.documents.append(document(4, '2024-01-03T08:00:00Z', document_type='Receipt'))
+
+    # The newest stored document is fetched again, since creation times can tie
+    assert sync(api, path) == 2
+    assert api.full_fetches == 1
+    assert document_store.document_count(path=path) == 4
+    assert document_store.daily_counts('document_type', start='2024-01-03', path=path) == [
+        ('2024-01-03', 'Receipt', 1)]
+
+
+def test_incremental_sync_misses_edits_until_full_sync_is_due(api, path, monkeypatch):
+    sync(api, path)
+    api.documents[0] = document(1, '2024-01-01T10:00:00Z', document_type='Receipt', label='renamed', tags=[2])
+
+    sync(api, path)
+    assert api.full_fetches == 1
+    assert document_store.query_document_rows(search='renamed', path=path) == []
+
+    monkeypatch.setattr(document_store, 'FULL_SYNC_HOURS', 0)
+    assert sync(api, path) == 3
+    assert api.full_fetches == 2
+    assert [row[:3] for row in document_store.query_document_rows(search='renamed', path=path)] == [
+        (1, 'renamed', 'Receipt')]
+    assert document_store.daily_counts('document_type', end='2024-01-01', path=path) == [
+        ('2024-01-01', 'Receipt', 2)]
+    assert document_store.tag_counts(path=path) == {1: 1, 2: 2}
+
+
+def test_full_sync_is_due_after_interval(api, path):
+    sync(api, path)
+    with closing(document_store.connect(path)) as connection:
+        now = datetime.now(timezone.utc)
+        assert not document_store._full_sync_due(connection, now)
+        later = now + timedelta(hours=document_store.FULL_SYNC_HOURS)
+        assert document_store._full_sync_due(connection, later)
+
+
+def test_deletion_triggers_full_sync(api, path):
+    sync(api, path)
+    del api.documents[1]
+
+    assert sync(api, path) == 2
+    assert api.full_fetches == 2
+    assert document_store.dimension_totals('document_type', path=path) == {'Invoice': 2}
+    assert document_store.tag_counts(path=path) == {1: 1}
+
+
+def test_full_flag_forces_full_sync(api, path):
+    sync(api, path)
+    sync(api, path, full=True)
+    assert api.full_fetches == 2
+    assert document_store.document_count(path=path) == 3
+
+
+def test_upsert_moves_documents_between_buckets(path):
+    with closing(document_store.connect(path)) as connection, connection:
+        document_store.upsert_documents(connection, [document(1, '2024-01-01T10:00:00Z')])
+        document_store.upsert_documents(connection, [document(1, '2024-01-01T10:00:00Z', mimetype='image/jpeg')])
+    assert document_store.dimension_totals('file_extension', path=path) == {'JPEG': 1}
+    assert document_store.dimension_totals('document_type', path=path) == {'Invoice': 1}
+
+
+def test_query_document_rows_filters_sorts_and_pages(api, path):
+    sync(api, path)
+    rows = document_store.query_document_rows(start='2024-01-01', end='2024-01-01', order_by='label',
+                                              descending=True, path=path)
+    assert [row[0] for row in rows] == [2, 1]
+    assert document_store.count_document_rows(document_types=['Invoice'], path=path) == 2
+    assert [row[0] for row in document_store.query_document_rows(limit=1, offset=1, path=path)] == [2]
+    assert document_store.count_document_rows(search='DOC-_', path=path) == 0
+
+
+def test_documents_are_bucketed_on_the_server_local_day(path):
+    with closing(document_store.connect(path)) as connection, connection:
+        # 02:00 on Jan 2nd in Tokyo is still Jan 1st in UTC
+        document_store.upsert_documents(connection, [document(1, '2024-01-02T02:00:00+09:00')])
+    assert document_store.daily_counts('document_type', path=path) == [('2024-01-02', 'Invoice', 1)]
+    assert document_store.count_document_rows(start='2024-01-02', end='2024-01-02', path=path) == 1
+    assert document_store.count_document_rows(end='2024-01-01', path=path) == 0
+    assert document_store.query_document_rows(path=path)[0][4:] == ('2024-01-01T17:00:00.000000Z', '2024-01-02')
+
+
+def test_stores_without_created_day_are_migrated(path):
+    with closing(document_store.connect(path)) as connection, connection:
+        document_store.upsert_documents(connection, [document(1, '2024-01-02T02:00:00+09:00')])
+        connection.execute('DROP INDEX documents_created_day')
+        connection.execute('ALTER TABLE documents DROP COLUMN created_day')
+        connection.execute('DELETE FROM daily_counts')
+    assert document_store.query_document_rows(start='2024-01-02', path=path)[0][5] == '2024-01-02'
+    assert document_store.day_range(path=path) == ('2024-01-02', '2024-01-02')
+
+
+def test_extensions_map_back_to_stored_mimetypes(api, path):
+    api.documents.append(document(4, '2024-01-03T08:00:00Z', mimetype='image/PNG'))
+    sync(api, path)
+    mimetypes = document_store.mimetypes_for_extensions(['PNG'], path=path)
+    assert mimetypes == ['image/PNG', 'image/png']
+    assert [row[0] for row in document_store.query_document_rows(mimetypes=mimetypes, path=path)] == [2, 4]
+    assert document_store.count_document_rows(mimetypes=document_store.mimetypes_for_extensions(['TIFF'], path=path),
+                                              path=path) == 0
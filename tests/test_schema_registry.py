@@ -0,0 +1,39 @@
+import pytest
+
+from schema_registry import FieldValidator, load_validation_pattern
+
+
+def field(validation_arguments=None, required=False, lookup=None):
+    return FieldValidator({'required': required, 'metadata_type': {
+        'id': 7, 'label': 'Invoice number', 'validation_arguments': validation_arguments, 'lookup': lookup}})
+
+
+def test_pattern_is_read_from_validation_arguments():
+    assert load_validation_pattern("{'pattern': '^INV-\\d+$'}") == '^INV-\\d+$'
+
+
+@pytest.mark.parametrize('arguments', ["{'pattern': ", "{'regex': 'x'}", "['x']"])
+def test_malformed_arguments_raise(arguments):
+    with pytest.raises(ValueError):
+        load_validation_pattern(arguments)
+
+
+def test_valid_pattern_is_checked():
+    validator = field("{'pattern': '^INV-\\d+$'}")
+    assert validator.pattern_error is None
+    assert validator.error('INV-12') is None
+    assert validator.error('12') == 'Validation failed for Invoice number: 12'
+
+
+@pytest.mark.parametrize('arguments', ["{'pattern': ", "{'pattern': '(unclosed'}"])
+def test_unusable_patterns_are_reported_not_checked(arguments):
+    validator = field(arguments)
+    assert validator.pattern_error.startswith('Invalid validation pattern for Invoice number')
+    assert validator.error('anything') is None
+
+
+def test_required_and_lookup_fields():
+    validator = field(required=True, lookup='A,B')
+    assert validator.error(' ') == "Field 'Invoice number' is required."
+    assert validator.error('C') == 'Value for Invoice number is not one of its lookup options: C'
+    assert validator.error('A') is None
@@ -0,0 +1,58 @@
+import pytest
+
+import upload
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Replace the POST with a queue of outcomes: a status code, or an exception to raise."""
+    outcomes, calls = [], []
+
+    def send_submission(body, url=upload.SUBMIT_URL):
+        calls.append(body)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+    monkeypatch.setattr(upload, 'send_submission', send_submission)
+    monkeypatch.setattr(upload, 'BACKOFF_FACTOR', 0)
+    return outcomes, calls
+
+
+@pytest.mark.parametrize('first', [429, 503, upload.requests.ConnectionError('refused'),
+                                   upload.requests.ConnectTimeout('connect')])
+def test_requests_the_server_never_processed_are_retried(sent, first):
+    outcomes, calls = sent
+    outcomes.extend([first, 200])
+    assert upload.send_with_retry(b'body').status_code == 200
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize('status', [500, 502, 504])
+def test_server_errors_are_not_resent(sent, status):
+    outcomes, calls = sent
+    outcomes.append(status)
+    assert upload.send_with_retry(b'body').status_code == status
+    assert len(calls) == 1
+
+
+def test_read_timeouts_are_not_resent(sent):
+    outcomes, calls = sent
+    outcomes.append(upload.requests.ReadTimeout('read'))
+    with pytest.raises(upload.requests.ReadTimeout):
+        upload.send_with_retry(b'body')
+    assert len(calls) == 1
+
+
+def test_read_timeout_marks_the_batch_item_failed(sent, monkeypatch):
+    outcomes, _ = sent
+    outcomes.append(upload.requests.ReadTimeout('read'))
+    monkeypatch.setattr(upload, 'submission_body', lambda *args: b'body')
+    item = upload.submit_item(upload.BatchItem('a.pdf1', None, 1, {}))
+    assert (item.status, item.runs) == ('failed', 1)
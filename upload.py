@@ -0,0 +1,141 @@
+import base64
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from instrumentation import record_request
+
+SUBMIT_URL = os.environ.get('DMS_SUBMIT_URL', "https://dms.api.epik.live/api/processBase64File")
+DMS_DOMAIN = "sagawa.epik.live"
+CHUNK_SIZE = 3 * 256 * 1024   # raw bytes per base64 chunk; a multiple of 3 so chunks need no padding
+SUBMIT_TIMEOUT = (10, 300)    # connect and read timeouts in seconds
+MAX_RETRIES = 3               # retries after the first attempt
+BACKOFF_FACTOR = 1.0          # seconds, doubled on every retry
+RETRY_STATUSES = {429, 503}   # the server refused the request, so resending cannot create a duplicate
+BATCH_WORKERS = 4             # concurrent submissions in a batch
+
+
+class SubmissionBody:
+    """Streams the processBase64File JSON body, base64-encoding the file one chunk at a time.
+
+    The body has the same fields as the old data.json, but the file is never
+    held as one base64 string and nothing touches the disk. ``len()`` gives
+    the exact body size, so requests sends a Content-Length header and
+    streams the body by iterating over it.
+    """
+
+    def __init__(self, fileobj, file_size, file_name, doc_type_id, metadata_values, domain=DMS_DOMAIN):
+        self.fileobj = fileobj
+        self.file_size = file_size
+        metadata_list = [{"id": id, "value": value} for id, value in metadata_values.items()]
+        self.prefix = b'{"file_base64": "'
+        tail = json.dumps({"dms_domain": domain, "file_name": file_name,
+                           "doctype_id": doc_type_id, "docmeta_data": metadata_list})
+        self.suffix = b'", ' + tail[1:].encode('utf-8')
+
+    def __len__(self):
+        encoded_size = 4 * ((self.file_size + 2) // 3)
+        return len(self.prefix) + encoded_size + len(self.suffix)
+
+    def __iter__(self):
+        self.fileobj.seek(0)
+        yield self.prefix
+        while True:
+            chunk = self.fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield base64.b64encode(chunk)
+        yield self.suffix
+
+    def to_bytes(self):
+        """Return the whole body at once, for the optional JSON download."""
+        return b''.join(self)
+
+
+def submission_body(uploaded_file, doc_type_id, metadata_values):
+    """Return the streaming submission body for an uploaded file."""
+    return SubmissionBody(uploaded_file, uploaded_file.size, uploaded_file.name, doc_type_id, metadata_values)
+
+
+def send_submission(body, url=SUBMIT_URL):
+    """POST a submission body to the processing endpoint and return the response."""
+    headers = {'Content-Type': 'application/json'}
+    started = time.perf_counter()
+    try:
+        response = requests.post(url, data=body, headers=headers, timeout=SUBMIT_TIMEOUT)
+    except requests.RequestException as e:
+        record_request('POST', url, e.__class__.__name__, time.perf_counter() - started, 0)
+        raise
+    record_request('POST', url, response.status_code, time.perf_counter() - started, len(body))
+    return response
+
+
+def send_with_retry(body, url=SUBMIT_URL, max_retries=MAX_RETRIES):
+    """POST a submission, retrying with backoff only when the server cannot have processed it.
+
+    Connection failures (including connect timeouts) and 429/503 responses are
+    retried. A read timeout or another 5xx may come after the document was
+    created, so those are returned or raised for the operator to resend.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            response = send_submission(body, url)
+        except requests.ConnectionError:  # ConnectTimeout is a ConnectionError; ReadTimeout is not
+            if attempt == max_retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+        time.sleep(BACKOFF_FACTOR * (2 ** attempt))
+
+
+class BatchItem:
+    """One queued file of a batch upload and its submission state."""
+
+    def __init__(self, key, uploaded_file, doc_type_id, metadata_values):
+        self.key = key
+        self.uploaded_file = uploaded_file
+        self.doc_type_id = doc_type_id
+        self.metadata_values = metadata_values
+        self.status = 'queued'   # queued, sending, done or failed
+        self.error = None
+        self.runs = 0
+        self.seconds = None
+
+    @property
+    def size(self):
+        return self.uploaded_file.size
+
+
+def submit_item(item):
+    """Submit one batch item, recording its outcome on the item instead of raising."""
+    item.status = 'sending'
+    item.runs += 1
+    started = time.monotonic()
+    try:
+        response = send_with_retry(submission_body(item.uploaded_file, item.doc_type_id, item.metadata_values))
+    except requests.RequestException as e:
+        item.status, item.error = 'failed', str(e)
+    else:
+        if response.status_code == 200:
+            item.status, item.error = 'done', None
+        else:
+            item.status, item.error = 'failed', f"Status {response.status_code}"
+    item.seconds = time.monotonic() - started
+    return item
+
+
+def run_batch(items, max_workers=BATCH_WORKERS):
+    """Submit every item that is not done yet over a bounded pool, yielding items as they finish.
+
+    Items already submitted successfully are skipped, so a failed batch can
+    be resumed by running it again.
+    """
+    pending = [item for item in items if item.status != 'done']
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [pool.submit(submit_item, item) for item in pending]
+        for future in as_completed(futures):
+            yield future.result()